@@ -4,10 +4,19 @@ import joblib
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-from datetime import datetime
+import glob
 import os
+import tempfile
+import time
+from contextlib import nullcontext
+from pathlib import Path
 from sklearn.preprocessing import StandardScaler
 
+from encoder import PatientEncoder, validate_patients
+from log_analytics import LogAggregator
+from risk_surface import risk_surface, verify_fast_path
+from prediction_log import PredictionLog
+
 # -----------------------------
 # PAGE CONFIG
 # -----------------------------
@@ -384,11 +393,15 @@ load_css()
 def load_model():
     try:
         model = joblib.load("heart_disease_svm_pipeline.pkl")
-        return model, None
+        # Compiled once from the pipeline's own column names
+        encoder = PatientEncoder.from_model(model)
+        # Checked once per model; otherwise the what-if surface uses predict_proba
+        fast_surface = verify_fast_path(model, encoder)
+        return model, encoder, fast_surface, None
     except Exception as e:
-        return None, str(e)
+        return None, None, False, str(e)
 
-model, load_error = load_model()
+model, encoder, fast_surface, load_error = load_model()
 
 # -----------------------------
 # HEADER SECTION WITH ANIMATION
@@ -527,30 +540,96 @@ def validate_inputs(bp, chol, oldpeak, age):
     return warnings, risk_factors
 
 # -----------------------------
-# LOGGING (SAFE APPEND)
+# LOGGING (BUFFERED APPEND)
 # -----------------------------
-def log_prediction(age, risk, risk_level):
-    file = "prediction_log.csv"
-    log = pd.DataFrame([{
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "age": age,
-        "risk_percent": round(risk, 2),
-        "risk_level": risk_level
-    }])
+@st.cache_resource
+def load_prediction_log():
+    # One background writer per server process, shared by all sessions
+    return PredictionLog("prediction_log.csv")
 
-    if not os.path.exists(file):
-        log.to_csv(file, index=False)
-    else:
-        log.to_csv(file, mode="a", header=False, index=False)
+def log_prediction(patient, risk, risk_level):
+    load_prediction_log().log(patient, risk, risk_level)
+
+@st.cache_resource
+def load_log_analytics():
+    # Running totals kept across reruns; each refresh reads only newly appended rows
+    return LogAggregator("prediction_log.csv")
+
+# -----------------------------
+# WHAT-IF RISK SURFACE
+# -----------------------------
+@st.cache_resource(max_entries=64, show_spinner=False)
+def load_risk_surface(patient_key):
+    # Keyed on every field except the two the surface varies; shared read-only, not copied per rerun
+    return risk_surface(model, encoder, dict(patient_key), fast_path=fast_surface)
+
+def surface_key(patient):
+    return tuple(sorted((k, v) for k, v in patient.items() if k not in ('Cholesterol', 'RestingBP')))
+
+# -----------------------------
+# BATCH SCORING
+# -----------------------------
+BATCH_CHUNK_ROWS = 20_000
+# Files larger than Streamlit's upload limit (server.maxUploadSize, 200 MB by
+# default; uploads are held in memory) can be dropped here and scored from disk
+BATCH_INPUT_DIR = os.environ.get("HEART_BATCH_DIR", "batch_input")
+# Scored files are temp files; those older than this are removed on the next run
+BATCH_RESULT_MAX_AGE = 24 * 3600
+
+def risk_levels(prob):
+    # Same cut-offs as the single-patient assessment (prob in percent)
+    return np.select([prob < 30, prob < 60], ["Low", "Moderate"], "High")
+
+def score_batch(file, model, encoder, out_path, chunk_rows=BATCH_CHUNK_ROWS, progress=None):
+    """Score a heart.csv-style file chunk by chunk, never holding more than one chunk.
+
+    Every row is written to ``out_path`` with ``risk_percent`` and
+    ``risk_level`` appended (rows with missing or unknown values get level
+    "Invalid"). Returns the number of patients per risk level.
+    """
+    counts = {"Low": 0, "Moderate": 0, "High": 0, "Invalid": 0}
+    size = getattr(file, 'size', None)
+    total_bytes = max(os.fstat(file.fileno()).st_size if size is None else size, 1)
+    for i, chunk in enumerate(pd.read_csv(file, chunksize=chunk_rows)):
+        patients, valid = validate_patients(chunk)
+        prob = np.full(len(chunk), np.nan)
+        if valid.any():
+            # One vectorized predict_proba call per chunk
+            X = encoder.to_frame(encoder.encode(patients[valid]))
+            prob[valid.to_numpy()] = model.predict_proba(X)[:, 1] * 100
+        chunk['risk_percent'] = prob.round(2)
+        chunk['risk_level'] = np.where(valid, risk_levels(prob), "Invalid")
+        chunk.to_csv(out_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+
+        for level, n in chunk['risk_level'].value_counts().items():
+            counts[level] += int(n)
+        if progress is not None:
+            progress(min(file.tell() / total_bytes, 1.0), sum(counts.values()))
+    return counts
+
+def batch_input_files():
+    return sorted(glob.glob(os.path.join(BATCH_INPUT_DIR, "*.csv")))
+
+def remove_old_batch_results(max_age=BATCH_RESULT_MAX_AGE):
+    # Sessions end without notice, so their result files are cleaned up by age
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), "heart_batch_*.csv")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
 
 # -----------------------------
 # TABS
 # -----------------------------
-tab1, tab2, tab3, tab4 = st.tabs([
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
     "📋 Patient Data Entry",
     "🔍 Risk Analysis",
     "💡 Health Guidance",
-    "🤖 Model Insights"
+    "🤖 Model Insights",
+    "📁 Batch Screening",
+    "📈 Prediction Analytics"
 ])
 
 # -----------------------------
@@ -672,49 +751,22 @@ with tab2:
             # Validate inputs
             warnings, risk_factors = validate_inputs(resting_bp, cholesterol, oldpeak, age)
             
-            # Build input dataframe with all required features
-            # Create a dataframe with zeros for all possible columns
-            all_columns = ['Age', 'RestingBP', 'Cholesterol', 'FastingBS', 'MaxHR', 'Oldpeak',
-                          'Sex_M', 'ChestPainType_ATA', 'ChestPainType_NAP', 'ChestPainType_TA',
-                          'RestingECG_Normal', 'RestingECG_ST', 'ExerciseAngina_Y', 'ST_Slope_Flat', 'ST_Slope_Up']
-            
-            input_data = pd.DataFrame(0, index=[0], columns=all_columns)
-            
-            # Fill in the values
-            input_data['Age'] = age
-            input_data['RestingBP'] = resting_bp
-            input_data['Cholesterol'] = cholesterol
-            input_data['FastingBS'] = fasting_bs_code
-            input_data['MaxHR'] = max_hr
-            input_data['Oldpeak'] = oldpeak
-            
-            # One-hot encoded features
-            if sex_code == "M":
-                input_data['Sex_M'] = 1
-            
-            # Chest pain type
-            if chest_pain_code == "ATA":
-                input_data['ChestPainType_ATA'] = 1
-            elif chest_pain_code == "NAP":
-                input_data['ChestPainType_NAP'] = 1
-            elif chest_pain_code == "TA":
-                input_data['ChestPainType_TA'] = 1
-            
-            # Resting ECG
-            if resting_ecg_code == "Normal":
-                input_data['RestingECG_Normal'] = 1
-            elif resting_ecg_code == "ST":
-                input_data['RestingECG_ST'] = 1
-            
-            # Exercise angina
-            if exercise_angina_code == "Y":
-                input_data['ExerciseAngina_Y'] = 1
+            # Raw patient fields, encoded straight into the model's column order
+            patient = {
+                'Age': age,
+                'Sex': sex_code,
+                'ChestPainType': chest_pain_code,
+                'RestingBP': resting_bp,
+                'Cholesterol': cholesterol,
+                'FastingBS': fasting_bs_code,
+                'RestingECG': resting_ecg_code,
+                'MaxHR': max_hr,
+                'ExerciseAngina': exercise_angina_code,
+                'Oldpeak': oldpeak,
+                'ST_Slope': st_slope
+            }
             
-            # ST Slope
-            if st_slope == "Flat":
-                input_data['ST_Slope_Flat'] = 1
-            elif st_slope == "Up":
-                input_data['ST_Slope_Up'] = 1
+            input_data = encoder.to_frame(encoder.encode_one(patient))
             
             # Make prediction
             try:
@@ -736,7 +788,7 @@ with tab2:
                 else:
                     risk_level = "High"
                 
-                log_prediction(age, prob, risk_level)
+                log_prediction(patient, prob, risk_level)
                 
                 # Store results in session state
                 st.session_state['prob'] = prob
@@ -745,19 +797,15 @@ with tab2:
                 st.session_state['risk_factors'] = risk_factors
                 st.session_state['input_data'] = input_data
                 st.session_state['scaled_data'] = scaled_data
-                
-                # Simulation - create modified input
-                sim_input = input_data.copy()
-                sim_input['Cholesterol'] = sim_chol
-                sim_input['RestingBP'] = sim_bp
-                
-                # Get simulation probability
-                sim_proba = model.predict_proba(sim_input)[0]
-                sim_prob = sim_proba[1] * 100
-                st.session_state['sim_prob'] = sim_prob
+                st.session_state['patient'] = patient
                 
             except Exception as e:
                 st.error(f"Prediction error: {str(e)}")
+        
+        # Simulation - every slider move is a lookup in the patient's cached risk surface
+        if 'patient' in st.session_state:
+            surface = load_risk_surface(surface_key(st.session_state['patient']))
+            st.session_state['sim_prob'] = surface.at(sim_chol, sim_bp)
     
     with col2:
         if 'prob' in st.session_state:
@@ -910,6 +958,34 @@ with tab2:
                         <p style="color: {delta_color}; margin: 0; font-size: 0.9rem;">{delta:+.1f}% change</p>
                     </div>
                     ''', unsafe_allow_html=True)
+                
+                # Risk over the whole cholesterol x BP range (every 5 mg/dL and 2 mmHg is plenty to draw)
+                patient = st.session_state['patient']
+                fig = go.Figure(go.Heatmap(
+                    z=surface.risk[::5, ::2], x=surface.resting_bp[::2], y=surface.cholesterol[::5],
+                    zmin=0, zmax=100, colorscale=[[0, '#28a745'], [0.3, '#ffc107'], [0.6, '#dc3545'], [1, '#721c24']],
+                    colorbar={'title': 'Risk %'},
+                    hovertemplate='BP %{x} mmHg<br>Cholesterol %{y} mg/dL<br>Risk %{z:.1f}%<extra></extra>'
+                ))
+                fig.add_trace(go.Scatter(
+                    x=[patient['RestingBP']], y=[patient['Cholesterol']], mode='markers', name='Current',
+                    marker={'color': 'white', 'size': 12, 'line': {'color': '#1e293b', 'width': 2}}
+                ))
+                fig.add_trace(go.Scatter(
+                    x=[sim_bp], y=[sim_chol], mode='markers', name='Adjusted',
+                    marker={'color': '#667eea', 'size': 12, 'symbol': 'x', 'line': {'color': 'white', 'width': 1}}
+                ))
+                fig.update_layout(
+                    title={'text': 'What-if Risk Surface', 'font': {'size': 18, 'color': '#1e293b'}},
+                    xaxis_title='Resting BP (mmHg)',
+                    yaxis_title='Cholesterol (mg/dL)',
+                    height=420,
+                    margin=dict(l=30, r=30, t=50, b=10),
+                    legend={'orientation': 'h', 'y': -0.2},
+                    paper_bgcolor="rgba(0,0,0,0)",
+                    font={'family': 'Plus Jakarta Sans'}
+                )
+                st.plotly_chart(fig, width='stretch')
             
             st.markdown('</div>', unsafe_allow_html=True)
         
@@ -1282,6 +1358,158 @@ with tab4:
     
     st.plotly_chart(fig, width='stretch')
 
+# -----------------------------
+# TAB 5 — BATCH SCREENING
+# -----------------------------
+with tab5:
+    st.markdown('<h2 class="section-header">📁 Batch Patient Screening</h2>', unsafe_allow_html=True)
+    st.markdown('<p style="color: #64748b; margin-bottom: 2rem;">Upload a CSV with the same columns as heart.csv to score a whole cohort at once</p>', unsafe_allow_html=True)
+    
+    server_files = batch_input_files()
+    source = "Upload"
+    if server_files:
+        source = st.radio("Source", ["Upload", "Server folder"], horizontal=True, key="batch_source")
+    
+    if source == "Upload":
+        uploaded = st.file_uploader("Patient file (CSV)", type="csv", key="batch_file")
+        st.caption(f"Uploads are held in memory and limited to {st.get_option('server.maxUploadSize')} MB "
+                   f"(server.maxUploadSize). For larger files, copy them into `{os.path.abspath(BATCH_INPUT_DIR)}` "
+                   f"on the server; they are then read from disk in chunks.")
+        batch_name = uploaded.name if uploaded is not None else None
+    else:
+        batch_path = st.selectbox("Patient file (CSV)", server_files, format_func=os.path.basename, key="batch_path")
+        batch_name = os.path.basename(batch_path)
+    
+    if batch_name is not None and st.button("⚡ Score Patients", key="score_batch"):
+        # Replace the previous result file of this session
+        if 'batch' in st.session_state and os.path.exists(st.session_state['batch']['path']):
+            os.remove(st.session_state['batch']['path'])
+        remove_old_batch_results()
+        out_file = tempfile.NamedTemporaryFile(prefix="heart_batch_", suffix=".csv", delete=False)
+        out_file.close()
+        
+        progress_bar = st.progress(0.0, text="Scoring patients...")
+        try:
+            # Server files are streamed from disk; the upload is already in memory
+            with nullcontext(uploaded) if source == "Upload" else open(batch_path, 'rb') as source_file:
+                counts = score_batch(
+                    source_file, model, encoder, out_file.name,
+                    progress=lambda done, rows: progress_bar.progress(done, text=f"Scored {rows:,} patients...")
+                )
+            progress_bar.progress(1.0, text=f"Scored {sum(counts.values()):,} patients")
+            st.session_state['batch'] = {'name': batch_name, 'path': out_file.name, 'counts': counts}
+        except Exception as e:
+            progress_bar.empty()
+            os.remove(out_file.name)
+            st.error(f"Could not score file: {str(e)}")
+    
+    if 'batch' in st.session_state:
+        batch = st.session_state['batch']
+        counts = batch['counts']
+        total = sum(counts.values())
+        
+        st.markdown(f"#### 📊 Risk Summary — {batch['name']}")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        for col, level in zip([col1, col2, col3, col4], ["Low", "Moderate", "High", "Invalid"]):
+            with col:
+                st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+                st.markdown(f'<div class="metric-value">{counts[level]:,}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="metric-label">{level}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div style="font-size: 0.8rem; color: #94a3b8;">{counts[level] / max(total, 1) * 100:.1f}% of patients</div>', unsafe_allow_html=True)
+                st.markdown('</div>', unsafe_allow_html=True)
+        
+        fig = px.pie(
+            names=list(counts), values=list(counts.values()), hole=0.5,
+            color=list(counts),
+            color_discrete_map={"Low": "#28a745", "Moderate": "#ffc107", "High": "#dc3545", "Invalid": "#94a3b8"}
+        )
+        fig.update_layout(
+            height=400,
+            paper_bgcolor="rgba(0,0,0,0)",
+            font={'family': 'Plus Jakarta Sans'}
+        )
+        st.plotly_chart(fig, width='stretch')
+        
+        if os.path.exists(batch['path']):
+            # Read only when clicked; Streamlit still serves the download from memory
+            path = batch['path']
+            st.download_button("⬇️ Download Scored File", Path(path).read_bytes,
+                               file_name=f"scored_{batch['name']}", mime="text/csv", key="download_batch")
+            st.caption(f"Scored file on the server: `{path}` (removed after "
+                       f"{BATCH_RESULT_MAX_AGE // 3600} h). Large results are best copied from there.")
+
+# -----------------------------
+# TAB 6 — PREDICTION ANALYTICS
+# -----------------------------
+with tab6:
+    st.markdown('<h2 class="section-header">📈 Prediction Analytics</h2>', unsafe_allow_html=True)
+    st.markdown('<p style="color: #64748b; margin-bottom: 2rem;">Volume, risk mix and age-band trends of the assessments logged so far</p>', unsafe_allow_html=True)
+    
+    analytics = load_log_analytics()
+    analytics.refresh()
+    summary = analytics.summary()
+    
+    if summary['rows'] == 0:
+        st.info("No predictions logged yet. Assessments from the Risk Analysis tab will show up here.")
+    else:
+        risk_mix = summary['risk_mix']
+        col1, col2, col3, col4 = st.columns(4)
+        for col, label, value in zip([col1, col2, col3, col4],
+                                     ["Predictions", "Low", "Moderate", "High"],
+                                     [summary['rows']] + [risk_mix[level] for level in ["Low", "Moderate", "High"]]):
+            with col:
+                st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+                st.markdown(f'<div class="metric-value">{value:,}</div>', unsafe_allow_html=True)
+                st.markdown(f'<div class="metric-label">{label}</div>', unsafe_allow_html=True)
+                st.markdown('</div>', unsafe_allow_html=True)
+        
+        risk_colors = {"Low": "#28a745", "Moderate": "#ffc107", "High": "#dc3545"}
+        
+        # Volume over time, stacked by risk level
+        hourly = summary['hourly'].reset_index().melt(id_vars='hour', var_name='Risk Level', value_name='Predictions')
+        fig = px.bar(hourly, x='hour', y='Predictions', color='Risk Level',
+                     color_discrete_map=risk_colors, title='Predictions per Hour')
+        fig.update_layout(
+            height=400,
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(0,0,0,0)",
+            font={'family': 'Plus Jakarta Sans'},
+            title={'font': {'size': 18, 'color': '#1e293b'}},
+            xaxis_title=None
+        )
+        st.plotly_chart(fig, width='stretch')
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            histogram = summary['risk_histogram']
+            histogram['Risk (%)'] = [f"{a:.0f}-{b:.0f}" for a, b in zip(histogram['risk_from'], histogram['risk_to'])]
+            fig = px.bar(histogram, x='Risk (%)', y='count', title='Risk Score Distribution',
+                         labels={'count': 'Predictions'}, color_discrete_sequence=['#667eea'])
+            fig.update_layout(
+                height=400,
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                font={'family': 'Plus Jakarta Sans'},
+                title={'font': {'size': 18, 'color': '#1e293b'}}
+            )
+            st.plotly_chart(fig, width='stretch')
+        
+        with col2:
+            fig = px.line(summary['age_trend'], x='day', y='mean_risk', color='age_band', markers=True,
+                          title='Average Risk by Age Band',
+                          labels={'mean_risk': 'Average Risk (%)', 'age_band': 'Age Band', 'day': 'Day'})
+            fig.update_layout(
+                height=400,
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                font={'family': 'Plus Jakarta Sans'},
+                title={'font': {'size': 18, 'color': '#1e293b'}}
+            )
+            fig.update_yaxes(range=[0, 100])
+            st.plotly_chart(fig, width='stretch')
+
 # -----------------------------
 # FOOTER
 # -----------------------------
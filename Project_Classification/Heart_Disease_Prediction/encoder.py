@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+# Raw patient fields (heart.csv column names) and the values allowed in the categorical ones
+NUMERIC_FIELDS = ['Age', 'RestingBP', 'Cholesterol', 'FastingBS', 'MaxHR', 'Oldpeak']
+CATEGORIES = {
+    'Sex': ['M', 'F'],
+    'ChestPainType': ['ASY', 'ATA', 'NAP', 'TA'],
+    'RestingECG': ['LVH', 'Normal', 'ST'],
+    'ExerciseAngina': ['N', 'Y'],
+    'ST_Slope': ['Down', 'Flat', 'Up'],
+}
+PATIENT_FIELDS = NUMERIC_FIELDS + list(CATEGORIES)
+# A zero Cholesterol / RestingBP means "not measured"; the notebook used the training mean
+TRAINING_MEANS = {'Cholesterol': 245.2, 'RestingBP': 133.01}
+
+
+def validate_patients(frame):
+    """Check a batch of raw patients (one row per patient).
+
+    Returns ``(patients, valid)``: ``patients`` is a copy with the numeric
+    fields converted to numbers (NaN where they could not be) and ``valid``
+    a boolean Series marking rows with every field present and known.
+    Raises ValueError if a column is missing altogether.
+    """
+    missing = [field for field in PATIENT_FIELDS if field not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    patients = frame.copy()
+    for field in NUMERIC_FIELDS:
+        patients[field] = pd.to_numeric(patients[field], errors='coerce')
+    valid = patients[NUMERIC_FIELDS].notna().all(axis=1)
+    for field, allowed in CATEGORIES.items():
+        valid &= patients[field].isin(allowed)
+    return patients, valid
+
+
+class PatientEncoder:
+    """One-hot encoder compiled once from the fitted pipeline's feature names.
+
+    Each model column is resolved to a numeric field or a (field, value)
+    pair up front, so encoding is a few writes into a preallocated NumPy
+    matrix in the model's own column order. A retrained model with other
+    dummy columns needs no code change; a column the encoder cannot explain
+    raises ValueError when the encoder is built.
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.columns = pd.Index(self.feature_names)
+
+        # Numeric field -> column position, and field -> {value: column position}.
+        # The category dropped by drop_first has no column and leaves its group at 0.
+        self.numeric_index = {}
+        self.one_hot_index = {field: {} for field in CATEGORIES}
+        for i, col in enumerate(self.feature_names):
+            if col in NUMERIC_FIELDS:
+                self.numeric_index[col] = i
+                continue
+            for field, values in CATEGORIES.items():
+                value = col[len(field) + 1:]
+                if col.startswith(field + '_') and value in values:
+                    self.one_hot_index[field][value] = i
+                    break
+            else:
+                raise ValueError(f"Unknown model feature: {col!r}")
+
+        missing = [field for field in NUMERIC_FIELDS if field not in self.numeric_index]
+        if missing:
+            raise ValueError(f"Model has no column for: {', '.join(missing)}")
+
+        # Per field: allowed values, and the column of each (-1 for the dropped one)
+        self._categories = {
+            field: (pd.Index(values), np.array([index.get(v, -1) for v in values], dtype=np.intp))
+            for field, values in CATEGORIES.items() for index in [self.one_hot_index[field]]
+        }
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(model.feature_names_in_)
+
+    def encode_one(self, patient):
+        """Encode a single raw patient dict into a (1, n_features) matrix."""
+        row = np.zeros((1, self.n_features))
+        x = row[0]
+        for field, i in self.numeric_index.items():
+            value = float(patient[field])
+            if value == 0 and field in TRAINING_MEANS:
+                value = TRAINING_MEANS[field]
+            x[i] = value
+        for field, index in self.one_hot_index.items():
+            value = patient[field]
+            if value not in CATEGORIES[field]:
+                raise ValueError(f"Unknown {field}: {value!r}")
+            idx = index.get(value)
+            if idx is not None:
+                x[idx] = 1
+        return row
+
+    def encode(self, patients):
+        """Encode many patients at once.
+
+        ``patients`` is a DataFrame with the ``PATIENT_FIELDS`` columns (rows
+        already validated, see ``validate_patients``) or a list of raw
+        patient dicts. Returns a float matrix with one row per patient.
+        """
+        if not isinstance(patients, pd.DataFrame):
+            patients = pd.DataFrame(list(patients), columns=PATIENT_FIELDS)
+        n = len(patients)
+        X = np.zeros((n, self.n_features))
+        rows = np.arange(n)
+
+        for field, i in self.numeric_index.items():
+            values = patients[field].to_numpy(dtype=float)
+            if field in TRAINING_MEANS:
+                values = np.where(values == 0, TRAINING_MEANS[field], values)
+            X[:, i] = values
+
+        for field, (lookup, positions) in self._categories.items():
+            found = lookup.get_indexer(pd.Index(patients[field], dtype=object))
+            if (found < 0).any():
+                raise ValueError(f"Unknown {field} values; validate the rows first")
+            cols = positions[found]
+            hit = cols >= 0
+            X[rows[hit], cols[hit]] = 1
+        return X
+
+    def to_frame(self, X):
+        """Wrap an encoded matrix with the model's column names (the pipeline was fitted on a DataFrame)."""
+        return pd.DataFrame(X, columns=self.columns, copy=False)
@@ -0,0 +1,123 @@
+"""Rolling summaries of ``prediction_log.csv`` that are updated incrementally.
+
+``LogAggregator.refresh`` reads only the bytes appended since the last
+refresh (up to the last complete line) and folds them into running totals:
+
+* predictions per hour, split by risk level
+* a 10-bin histogram of ``risk_percent``
+* per day and age band, the number of predictions and the summed risk (for
+  the mean)
+
+A refresh with nothing new is a single ``stat``, so the dashboard costs the
+same with a thousand or a hundred million logged rows. The first refresh
+reads the existing log in ``block_bytes`` blocks. If the file is replaced
+or truncated (log migration, manual cleanup), everything is recomputed
+from the start.
+"""
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+RISK_LEVELS = ["Low", "Moderate", "High"]
+AGE_BANDS = ['18-30', '31-45', '46-60', '61-75', '75+']
+AGE_BAND_EDGES = [-np.inf, 30, 45, 60, 75, np.inf]
+RISK_BINS = np.linspace(0, 100, 11)
+
+
+class LogAggregator:
+    def __init__(self, path, block_bytes=16 * 2**20):
+        self.path = path
+        self.block_bytes = block_bytes
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.inode = None
+        self.columns = None
+        self.rows = 0
+        self.hourly = pd.DataFrame(columns=RISK_LEVELS, dtype='int64')
+        self.risk_histogram = np.zeros(len(RISK_BINS) - 1, dtype=np.int64)
+        self.age_trend = pd.DataFrame(columns=['count', 'risk_sum'],
+                                      index=pd.MultiIndex.from_tuples([], names=['day', 'age_band']))
+
+    def refresh(self):
+        """Fold in whatever was appended since the last call; returns the number of new rows."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                return 0
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                self._reset()
+                self.inode = stat.st_ino
+            if stat.st_size == self.offset:
+                return 0
+
+            before = self.rows
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                remaining = stat.st_size - self.offset
+                carry = b''
+                while remaining > 0:
+                    block = carry + f.read(min(self.block_bytes, remaining))
+                    remaining -= len(block) - len(carry)
+                    # Only complete lines; a partially written one waits for the next refresh
+                    end = block.rfind(b'\n') + 1
+                    carry = block[end:]
+                    if end:
+                        self._consume(block[:end])
+                        self.offset += end
+            return self.rows - before
+
+    def _consume(self, data):
+        if self.columns is None:
+            header, _, data = data.partition(b'\n')
+            self.columns = header.decode().strip().split(',')
+            if not data:
+                return
+        frame = pd.read_csv(io.BytesIO(data), header=None, names=self.columns,
+                            usecols=['timestamp', 'age', 'risk_percent', 'risk_level'])
+        frame = frame.dropna(subset=['timestamp', 'risk_percent'])
+        if frame.empty:
+            return
+        self.rows += len(frame)
+
+        hour = frame['timestamp'].astype(str).str[:13]
+        counts = pd.crosstab(hour, frame['risk_level']).reindex(columns=RISK_LEVELS, fill_value=0)
+        self.hourly = self.hourly.add(counts, fill_value=0).astype('int64')
+
+        self.risk_histogram += np.histogram(frame['risk_percent'].clip(0, 100), RISK_BINS)[0]
+
+        band = pd.cut(frame['age'], AGE_BAND_EDGES, labels=AGE_BANDS)
+        trend = frame.assign(day=hour.str[:10], age_band=band).groupby(['day', 'age_band'], observed=True)
+        trend = pd.DataFrame({'count': trend.size(), 'risk_sum': trend['risk_percent'].sum()})
+        self.age_trend = self.age_trend.add(trend, fill_value=0)
+
+    def summary(self):
+        """Copies of the running totals, ready for plotting."""
+        with self._lock:
+            hourly = self.hourly.sort_index()
+            hourly.index = pd.to_datetime(hourly.index, format="%Y-%m-%d %H")
+            hourly.index.name = 'hour'
+
+            age_trend = self.age_trend.sort_index().reset_index()
+            age_trend['mean_risk'] = age_trend['risk_sum'] / age_trend['count']
+            age_trend['count'] = age_trend['count'].astype('int64')
+
+            histogram = pd.DataFrame({
+                'risk_from': RISK_BINS[:-1],
+                'risk_to': RISK_BINS[1:],
+                'count': self.risk_histogram.copy(),
+            })
+            return {
+                'rows': self.rows,
+                'risk_mix': hourly.sum().astype('int64'),
+                'hourly': hourly,
+                'risk_histogram': histogram,
+                'age_trend': age_trend[['day', 'age_band', 'count', 'mean_risk']],
+            }
@@ -0,0 +1,172 @@
+"""Buffered, append-only writer for ``prediction_log.csv``.
+
+``PredictionLog.log`` only puts the record on a queue. One background
+thread per process collects records and writes them in batches, at most
+``max_batch`` at a time and at least every ``flush_seconds``:
+
+* each batch goes to the file in a single ``write`` on an ``O_APPEND``
+  descriptor, under an exclusive ``flock`` when available. Lines from
+  different sessions or server processes never interleave.
+* the batch is fsynced before the next one. A crash loses at most the
+  records still queued. A torn last line left by a crash is trimmed the
+  next time the log is opened.
+
+Every record holds the timestamp, the risk and all input fields. A log
+with the old four-column header (timestamp, age, risk_percent,
+risk_level) is migrated once, with the new columns left empty for old rows.
+"""
+import atexit
+import csv
+import io
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: O_APPEND writes only
+    fcntl = None
+
+# Raw patient field -> log column
+INPUT_COLUMNS = {
+    'Sex': 'sex',
+    'ChestPainType': 'chest_pain_type',
+    'RestingBP': 'resting_bp',
+    'Cholesterol': 'cholesterol',
+    'FastingBS': 'fasting_bs',
+    'RestingECG': 'resting_ecg',
+    'MaxHR': 'max_hr',
+    'ExerciseAngina': 'exercise_angina',
+    'Oldpeak': 'oldpeak',
+    'ST_Slope': 'st_slope',
+}
+# The first four columns are those of the original log
+LOG_COLUMNS = ['timestamp', 'age', 'risk_percent', 'risk_level'] + list(INPUT_COLUMNS.values())
+
+_CLOSE = object()
+
+
+class _Locked:
+    """Exclusive advisory lock on an open descriptor (no-op without fcntl)."""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+def _header():
+    return (','.join(LOG_COLUMNS) + '\n').encode()
+
+
+class PredictionLog:
+    def __init__(self, path, max_batch=256, flush_seconds=1.0):
+        self.path = path
+        self.max_batch = max_batch
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue()
+        self._prepare()
+        self._thread = threading.Thread(target=self._run, name='prediction-log', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, patient, risk, risk_level):
+        """Queue one prediction; never touches the disk."""
+        record = {
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'age': patient['Age'],
+            'risk_percent': round(risk, 2),
+            'risk_level': risk_level,
+        }
+        for field, column in INPUT_COLUMNS.items():
+            record[column] = patient[field]
+        self._queue.put(record)
+
+    def flush(self):
+        """Block until everything logged so far is on disk."""
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            closing = batch[0] is _CLOSE
+            # Collect more records until the batch is full or the time limit passes
+            deadline = time.monotonic() + self.flush_seconds
+            while not closing and len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                closing = batch[-1] is _CLOSE
+
+            records = [r for r in batch if r is not _CLOSE]
+            try:
+                if records:
+                    self._write(records)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if closing:
+                return
+
+    def _write(self, records):
+        buf = io.StringIO()
+        csv.DictWriter(buf, LOG_COLUMNS, lineterminator='\n').writerows(records)
+        data = buf.getvalue().encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            with _Locked(fd):
+                if os.fstat(fd).st_size == 0:
+                    data = _header() + data
+                os.write(fd, data)
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _prepare(self):
+        # Trim a torn last line and migrate an old header, under the same lock the writers use
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            with _Locked(fd):
+                size = os.fstat(fd).st_size
+                if size == 0:
+                    return
+                with open(self.path, 'rb') as f:
+                    f.seek(max(size - 4096, 0))
+                    tail = f.read()
+                cut = tail.rfind(b'\n')
+                if not tail.endswith(b'\n') and (cut >= 0 or len(tail) == size):
+                    os.ftruncate(fd, size - len(tail) + cut + 1)
+
+                with open(self.path, newline='') as f:
+                    header = next(csv.reader(f), None)
+                if header and header != LOG_COLUMNS:
+                    self._migrate()
+        finally:
+            os.close(fd)
+
+    def _migrate(self):
+        tmp = self.path + '.tmp'
+        with open(self.path, newline='') as src, open(tmp, 'w', newline='') as dst:
+            writer = csv.DictWriter(dst, LOG_COLUMNS, restval='', extrasaction='ignore', lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(csv.DictReader(src))
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, self.path)
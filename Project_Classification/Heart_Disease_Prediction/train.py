@@ -0,0 +1,116 @@
+"""Retrain the heart disease SVM pipeline outside the notebook.
+
+Reproduces Project.ipynb (zero Cholesterol / RestingBP replaced by the
+mean, one-hot encoding with ``drop_first``, StandardScaler + SVC) and
+writes ``heart_disease_svm_pipeline.pkl``. Without ``--search`` the SVC
+keeps the notebook's default parameters.
+
+``--search`` tunes C, gamma and the kernel with 5-fold stratified CV on
+F1 over the training 80% of the rows, in parallel on all cores:
+
+* ``grid``: exhaustive GridSearchCV
+* ``halving``: successive halving (HalvingGridSearchCV). Every candidate
+  is first scored on a small sample of the training rows and only the
+  best third moves on with three times as many rows, so a much larger
+  space costs about what a small exhaustive grid does.
+
+``--compare grid`` also runs the exhaustive grid and prints wall time and
+best score side by side::
+
+    python train.py --search halving --compare grid
+"""
+import argparse
+import json
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+# Imported only for its side effect of making the Halving*SearchCV classes importable
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import f1_score
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+SEARCH_SPACE = {
+    'model__C': np.logspace(-2, 3, 11).tolist(),
+    'model__gamma': ['scale'] + np.logspace(-4, 0, 9).tolist(),
+    'model__kernel': ['rbf', 'sigmoid'],
+}
+
+
+def load_data(path):
+    """The notebook's preprocessing; returns ``(X, y)``."""
+    df = pd.read_csv(path)
+    for col in ('Cholesterol', 'RestingBP'):
+        mean = df.loc[df[col] != 0, col].mean()
+        df[col] = df[col].replace(0, mean).round(2)
+    df_encoded = pd.get_dummies(df, drop_first=True).astype(int)
+    return df_encoded.drop('HeartDisease', axis=1), df_encoded['HeartDisease']
+
+
+def make_pipeline(**params):
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("model", SVC(probability=True, **params)),
+    ])
+
+
+def run_search(method, X, y, n_jobs, seed):
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=seed)
+    # probability=True is only needed for the final model and makes every fit ~5x slower
+    estimator = Pipeline([("scaler", StandardScaler()), ("model", SVC())])
+    if method == 'grid':
+        searcher = GridSearchCV(estimator, SEARCH_SPACE, scoring='f1', cv=cv, n_jobs=n_jobs)
+    else:
+        searcher = HalvingGridSearchCV(estimator, SEARCH_SPACE, scoring='f1', cv=cv, n_jobs=n_jobs,
+                                       factor=3, resource='n_samples', min_resources=60, random_state=seed)
+    start = time.perf_counter()
+    searcher.fit(X, y)
+    results = pd.DataFrame(searcher.cv_results_)
+    summary = {
+        'method': method,
+        'best_params': {k.replace('model__', ''): v for k, v in searcher.best_params_.items()},
+        'best_cv_f1': float(searcher.best_score_),
+        'candidates': int(results['params'].astype(str).nunique()),
+        'fits': int(len(results) * cv.get_n_splits()),
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+    if method == 'halving':
+        summary['candidates_per_iteration'] = [int(n) for n in searcher.n_candidates_]
+        summary['samples_per_iteration'] = [int(n) for n in searcher.n_resources_]
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Retrain the heart disease SVM pipeline.")
+    parser.add_argument('--data', default='heart.csv')
+    parser.add_argument('--output', default='heart_disease_svm_pipeline.pkl')
+    parser.add_argument('--search', choices=['grid', 'halving'])
+    parser.add_argument('--compare', nargs='*', default=[], choices=['grid', 'halving'])
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    X, y = load_data(args.data)
+    # The test rows are kept out of the search so the hold-out F1 below is unbiased
+    X_train, X_test, y_train, y_test = train_test_split(X, y, stratify=y, test_size=0.2, random_state=args.seed)
+    params = {}
+    if args.search:
+        results = [run_search(method, X_train, y_train, args.n_jobs, args.seed)
+                   for method in [args.search] + [m for m in args.compare if m != args.search]]
+        print(f"{'method':<10} {'candidates':>10} {'fits':>6} {'seconds':>9} {'best cv f1':>11}  best params")
+        for r in results:
+            print(f"{r['method']:<10} {r['candidates']:>10} {r['fits']:>6} {r['seconds']:>9.1f} "
+                  f"{r['best_cv_f1']:>11.4f}  {json.dumps(r['best_params'])}")
+        params = results[0]['best_params']
+
+    # Held-out check of the chosen parameters, then refit on everything like the notebook
+    holdout = make_pipeline(**params).fit(X_train, y_train)
+    print(f"Hold-out F1 with {params or 'default parameters'}: {f1_score(y_test, holdout.predict(X_test)):.4f}")
+
+    final_model = make_pipeline(**params).fit(X, y)
+    joblib.dump(final_model, args.output)
+    print(f"Saved {args.output}")
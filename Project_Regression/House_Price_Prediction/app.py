@@ -1,49 +1,175 @@
-from flask import Flask, request, render_template
-import joblib
+from flask import Flask, request, render_template, jsonify, send_file, url_for
 import numpy as np
 import pandas as pd
 
+from drift import DriftMonitor, load_baseline
+from encoder import validate_listings
+from forest_store import ArrayForest
+from jobs import JobManager
+from metrics import Metrics
+from model_registry import ModelRegistry, load_bundle
+from prediction_cache import MISSING, PredictionCache, cache_key
+
 app = Flask(__name__)
-model = joblib.load("random_forest_model.pkl")
+app.config['MAX_BATCH_ROWS'] = 100_000
+# Encode batches as sparse CSR matrices instead of dense frames
+app.config['BATCH_SPARSE'] = False
 
-# Load the list of feature columns saved during training
-feature_columns = joblib.load("feature_columns.pkl")  # Ensure this file exists
+# Optional micro-batching of concurrent /predict calls
+app.config['MICRO_BATCHING'] = False
+app.config['MICRO_BATCH_MAX_SIZE'] = 64
+app.config['MICRO_BATCH_MAX_WAIT_MS'] = 5
 
-# Extract lists for one-hot encoding info (if needed for other uses)
-locations_list = [col.replace('location_', '') for col in feature_columns if col.startswith('location_')]
-area_types_list = ['Built_up_Area', 'Carpet_Area', 'Plot_Area', 'Super_built_up_Area']
-balcony_values = [0.0, 1.0, 2.0, 3.0]
+# 'pickle' loads random_forest_model.pkl; 'arrays' memory-maps the node arrays
+# written by `python forest_store.py random_forest_model.pkl random_forest_arrays`
+# so all worker processes share one copy of the forest
+app.config['MODEL_FORMAT'] = 'pickle'
+app.config['MODEL_ARRAYS_DIR'] = 'random_forest_arrays'
 
-def preprocess_input(raw_input):
-    # Initialize all features with 0
-    data = dict.fromkeys(feature_columns, 0)
-    
-    # Assign numeric features
-    data['bath'] = raw_input['bath']
-    data['total_sqft'] = raw_input['total_sqft']
-    data['bhk'] = raw_input['size']
-    data['bath_per_size'] = raw_input['bath'] / raw_input['size'] if raw_input['size'] else 0
-    
-    # One-hot encode balcony count feature
-    balcony_col = f'balcony_{float(raw_input["balcony"])}'
-    if balcony_col in feature_columns:
-        data[balcony_col] = 1
-    
-    # One-hot encode location feature
-    loc_col = 'location_' + raw_input['location']
-    if loc_col in feature_columns:
-        data[loc_col] = 1
-    else:
-        # Use 'Other' if location unknown
-        data['location_Other'] = 1
-    
-    # One-hot encode area_type feature
-    area = raw_input['area_type']
-    if area in feature_columns:
-        data[area] = 1
-    
-    # Return as single-row dataframe suitable for model input
-    return pd.DataFrame([data])
+# 'sklearn' calls RandomForestRegressor.predict; 'arrays' compiles the pickled
+# forest into flat node arrays at startup and walks them directly (same results,
+# much lower single-row latency). Always 'arrays' when MODEL_FORMAT is 'arrays'.
+app.config['INFERENCE_ENGINE'] = 'sklearn'
+
+# In-process LRU cache of /predict results (size 0 disables, TTL in seconds)
+app.config['PREDICTION_CACHE_SIZE'] = 4096
+app.config['PREDICTION_CACHE_TTL'] = None
+
+# Answer on-grid inputs from a precomputed table built with
+# `python price_table.py random_forest_model.pkl feature_columns.pkl price_table`
+# (None disables; off-grid inputs always fall back to the model).
+# PRICE_TABLE_INTERPOLATE also answers total_sqft values between grid points by
+# linear interpolation. The forest is piecewise constant, so this is opt-in: on
+# the built table the error was 0.9% on average but up to ~7 Lakhs for a single
+# listing (see 'report' -> 'interpolated' in the table's meta.json).
+app.config['PRICE_TABLE_DIR'] = None
+app.config['PRICE_TABLE_INTERPOLATE'] = False
+
+# Also report a P10-P90 style band from the spread of the per-tree predictions
+# (percentiles given in INTERVAL_QUANTILES, e.g. FLASK_INTERVAL_QUANTILES='[5, 95]')
+app.config['PREDICTION_INTERVALS'] = False
+app.config['INTERVAL_QUANTILES'] = [10, 90]
+
+# Versioned artifact root (see artifacts.py). When set, the newest version is
+# served and newer ones are loaded, warmed and swapped in without a restart.
+# When None, the model files in the working directory are loaded once.
+app.config['MODEL_DIR'] = None
+app.config['MODEL_POLL_SECONDS'] = 5
+
+# Bulk scoring jobs (POST /jobs): uploaded files and results are kept under
+# JOBS_DIR and scored JOB_CHUNK_ROWS rows at a time by JOB_WORKERS processes
+app.config['JOBS_DIR'] = 'jobs'
+app.config['JOB_WORKERS'] = 1
+app.config['JOB_CHUNK_ROWS'] = 50_000
+
+# Compare live inputs with the training data (GET /admin/drift, drift gauges in
+# /metrics) using a baseline built once with
+# `python drift.py Bengaluru_House_Data.csv drift_baseline.json` (None disables).
+# Inputs are sketched in a background thread; at most DRIFT_QUEUE_SIZE input rows
+# wait there, and new ones are dropped (or batches subsampled) rather than
+# slowing requests down.
+app.config['DRIFT_BASELINE'] = None
+app.config['DRIFT_QUEUE_SIZE'] = 10_000
+
+# Override any setting above with FLASK_<NAME> environment variables,
+# e.g. FLASK_MICRO_BATCHING=true FLASK_MICRO_BATCH_MAX_WAIT_MS=10
+app.config.from_prefixed_env()
+
+if app.config['MODEL_DIR']:
+    # Serve the newest version under MODEL_DIR and hot-swap newer ones as they appear
+    registry = ModelRegistry(app.config['MODEL_DIR'], app.config, app.config['MODEL_POLL_SECONDS'])
+    if not registry.check():
+        raise RuntimeError(f"No loadable model version in {app.config['MODEL_DIR']}: {registry.last_error}")
+    registry.start()
+else:
+    # Load random_forest_model.pkl and feature_columns.pkl from the working directory
+    registry = ModelRegistry(None, app.config)
+    registry.activate(load_bundle('.', app.config, version='legacy'))
+
+# Per-stage latency histograms and request counters, served at /metrics
+metrics = Metrics()
+
+# Repeat queries skip preprocessing and the forest entirely
+cache = None
+if app.config['PREDICTION_CACHE_SIZE']:
+    cache = PredictionCache(app.config['PREDICTION_CACHE_SIZE'], ttl=app.config['PREDICTION_CACHE_TTL'])
+
+# Background scoring of large files in a process pool
+jobs = JobManager(app.config['JOBS_DIR'], app.config['JOB_WORKERS'], app.config['JOB_CHUNK_ROWS'])
+
+# Constant-memory sketches of the inputs seen so far
+drift = None
+if app.config['DRIFT_BASELINE']:
+    drift = DriftMonitor(load_baseline(app.config['DRIFT_BASELINE']), app.config['DRIFT_QUEUE_SIZE'])
+
+def preprocess_input(raw_input, bundle=None):
+    # Encode the listing with the precompiled encoder and
+    # return as single-row dataframe suitable for model input
+    encoder = (bundle or registry.active).encoder
+    return encoder.to_frame(encoder.encode_one(raw_input))
+
+def predict_price(raw_input, bundle=None):
+    # Use one model version for the whole request, even if a reload swaps it meanwhile
+    bundle = bundle or registry.active
+    if cache is not None:
+        # Entries from an older model or feature list are dropped here
+        cache.check_version(bundle.version)
+        key = (bundle.version,) + cache_key(raw_input)
+        prediction = cache.get(key)
+        if prediction is not MISSING:
+            return prediction
+
+    prediction = None
+    if bundle.price_table is not None:
+        with metrics.time('table_lookup'):
+            prediction = bundle.price_table.lookup(raw_input)
+    if prediction is None:
+        prediction = score_listing(raw_input, bundle)
+
+    if cache is not None:
+        cache.put(key, prediction)
+    return prediction
+
+def predict_interval(raw_input, bundle=None):
+    # Mean price plus per-tree percentiles, all trees scored in one pass
+    bundle = bundle or registry.active
+    quantiles = app.config['INTERVAL_QUANTILES']
+    if cache is not None:
+        cache.check_version(bundle.version)
+        key = (bundle.version, 'interval') + cache_key(raw_input)
+        result = cache.get(key)
+        if result is not MISSING:
+            return result
+
+    with metrics.time('preprocess'):
+        model_input = bundle.encoder.encode_one(raw_input)[0]
+    with metrics.time('predict_interval'):
+        prediction, bounds = bundle.forest.predict_one_interval(model_input, quantiles)
+    result = (prediction, dict(zip(quantiles, bounds.tolist())))
+
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+def score_listing(raw_input, bundle):
+    # Run the model on one listing
+    model, batcher = bundle.model, bundle.batcher
+    with metrics.time('preprocess'):
+        if batcher is not None or isinstance(model, ArrayForest):
+            model_input = bundle.encoder.encode_one(raw_input)[0]
+        else:
+            model_input = preprocess_input(raw_input, bundle)
+
+    with metrics.time('predict'):
+        if batcher is not None:
+            # Share one predict call with other requests arriving right now
+            prediction = batcher.predict(model_input)
+        elif isinstance(model, ArrayForest):
+            # Walk the compiled trees directly, no DataFrame needed
+            prediction = model.predict_one(model_input)
+        else:
+            prediction = model.predict(model_input)[0]
+    return prediction
 
 @app.route('/', methods=['GET'])
 def home():
@@ -51,47 +177,211 @@ def home():
 
 @app.route('/predict', methods=['POST'])
 def predict():
+    with metrics.time('request'):
+        return _predict()
+
+def _predict():
     try:
-        # Retrieve form data
-        size = request.form.get('size')
-        total_sqft = request.form.get('total_sqft')
-        bath = request.form.get('bath')
-        balcony = request.form.get('balcony')
-        area_type = request.form.get('area_type')
-        location = request.form.get('location')
+        with metrics.time('parse'):
+            # Retrieve form data
+            size = request.form.get('size')
+            total_sqft = request.form.get('total_sqft')
+            bath = request.form.get('bath')
+            balcony = request.form.get('balcony')
+            area_type = request.form.get('area_type')
+            location = request.form.get('location')
+            
+            # Validate all inputs present
+            valid = all([size, total_sqft, bath, balcony, area_type, location])
+            bundle = registry.active
+            if valid:
+                # Free text from the autocomplete: only exact (case/spacing-insensitive) names are priced
+                known_location = bundle.location_index.resolve(location)
+                if known_location is None:
+                    metrics.count_request('/predict', 'invalid')
+                    return render_template('index.html', error=f"Unknown location '{location}'. "
+                                           "Pick one from the suggestions, or 'Other' if it is not listed.")
+                location = known_location
+                
+                # Convert numeric fields to floats
+                size = float(size)
+                total_sqft = float(total_sqft)
+                bath = float(bath)
+                balcony = float(balcony)
+                
+                # Prepare raw input dictionary
+                raw_input = {
+                    'size': size,
+                    'total_sqft': total_sqft,
+                    'bath': bath,
+                    'balcony': balcony,
+                    'area_type': area_type,
+                    'location': location
+                }
         
-        # Validate all inputs present
-        if not all([size, total_sqft, bath, balcony, area_type, location]):
+        if not valid:
+            metrics.count_request('/predict', 'invalid')
             return render_template('index.html', error="Please select all fields properly.")
         
-        # Convert numeric fields to floats
-        size = float(size)
-        total_sqft = float(total_sqft)
-        bath = float(bath)
-        balcony = float(balcony)
-        
-        # Prepare raw input dictionary
-        raw_input = {
-            'size': size,
-            'total_sqft': total_sqft,
-            'bath': bath,
-            'balcony': balcony,
-            'area_type': area_type,
-            'location': location
-        }
-        
-        # Preprocess input for model
-        input_df = preprocess_input(raw_input)
+        if drift is not None:
+            drift.observe(raw_input)
         
-        # Predict price
-        prediction = model.predict(input_df)[0]
+        # Predict price (with a band from the per-tree spread if enabled)
+        interval = None
+        if app.config['PREDICTION_INTERVALS']:
+            prediction, bounds = predict_interval(raw_input, bundle)
+            interval = [(q, round(bound, 2)) for q, bound in bounds.items()]
+        else:
+            prediction = predict_price(raw_input, bundle)
         
         # Render result
-        return render_template('index.html', prediction=round(prediction, 2))
+        with metrics.time('render'):
+            page = render_template('index.html', prediction=round(prediction, 2), interval=interval)
+        metrics.count_request('/predict', 'ok')
+        return page
     
     except Exception as e:
         # Handle any error and show message
+        metrics.count_request('/predict', 'error')
         return render_template('index.html', error=f"Error: {str(e)}")
 
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        with metrics.time('batch_request'):
+            response, status = _predict_batch()
+    except Exception:
+        metrics.count_request('/api/predict/batch', 'error')
+        raise
+    metrics.count_request('/api/predict/batch', 'ok' if status == 200 else 'invalid')
+    return response, status
+
+def _predict_batch():
+    # Accept either an uploaded CSV file or a JSON array of listings
+    if 'file' in request.files:
+        try:
+            listings = pd.read_csv(request.files['file'], dtype=str, keep_default_na=False)
+        except Exception as e:
+            return jsonify(error=f"Could not read CSV: {str(e)}"), 400
+    else:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, list):
+            return jsonify(error="Expected a JSON array of listings or a CSV upload in 'file'."), 400
+        if not all(isinstance(item, dict) for item in payload):
+            return jsonify(error="Every listing must be a JSON object."), 400
+        listings = pd.DataFrame(payload)
+
+    if len(listings) > app.config['MAX_BATCH_ROWS']:
+        return jsonify(error=f"Batch too large (max {app.config['MAX_BATCH_ROWS']} rows)."), 413
+
+    # Validate every row, then score all valid rows with a single predict call
+    bundle = registry.active
+    with metrics.time('batch_validate'):
+        valid, errors = validate_listings(listings)
+    prices = {}
+    intervals = {}
+    if drift is not None and len(valid):
+        drift.observe(valid)
+    if len(valid):
+        with metrics.time('batch_preprocess'):
+            X = bundle.encoder.to_frame(bundle.encoder.encode(valid, sparse=app.config['BATCH_SPARSE']))
+        rows = valid.index.tolist()
+        if app.config['PREDICTION_INTERVALS']:
+            with metrics.time('batch_predict'):
+                # sklearn's apply finds all leaves in one call; the arrays forest walks them itself
+                model = None if bundle.model is bundle.forest else bundle.model
+                predictions, bounds = bundle.forest.predict_interval(X, app.config['INTERVAL_QUANTILES'], model)
+            for q, values in zip(app.config['INTERVAL_QUANTILES'], np.round(bounds, 2)):
+                intervals[f'p{q:g}'] = dict(zip(rows, values.tolist()))
+        else:
+            with metrics.time('batch_predict'):
+                predictions = bundle.model.predict(X)
+        prices = dict(zip(rows, np.round(predictions, 2).tolist()))
+
+    results = []
+    for i in range(len(listings)):
+        if i in errors:
+            results.append({'row': i, 'error': errors[i]})
+        else:
+            result = {'row': i, 'price': prices[i]}
+            for name, values in intervals.items():
+                result[name] = values[i]
+            results.append(result)
+
+    return jsonify(count=len(listings), predicted=len(prices), failed=len(errors), results=results), 200
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    # Upload a CSV in the Bengaluru_House_Data.csv schema; scoring runs in the background
+    if 'file' not in request.files:
+        return jsonify(error="Upload the listings CSV in 'file'."), 400
+    job_id = jobs.submit(request.files['file'], registry.active, app.config)
+    metrics.count_request('/jobs', 'ok')
+    return jsonify(id=job_id, status_url=url_for('job_status', job_id=job_id)), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify(error="Unknown job."), 404
+    if status['state'] == 'done':
+        status['result_url'] = url_for('job_result', job_id=job_id)
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    path = jobs.result_path(job_id)
+    if path is None:
+        return jsonify(error="No result for this job (yet)."), 404
+    return send_file(path, mimetype='text/csv', as_attachment=True, download_name=f'predictions-{job_id}.csv')
+
+@app.route('/api/locations', methods=['GET'])
+def locations():
+    prefix = request.args.get('prefix', '')
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    return jsonify(prefix=prefix, matches=registry.active.location_index.search(prefix, limit))
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    gauges = {}
+    if cache is not None:
+        gauges = {f'cache_{name}': value for name, value in cache.stats().items() if name != 'ttl'}
+    if drift is not None:
+        report = drift.report(top=0)
+        gauges.update(drift_observed=report['observed'], drift_dropped=report['dropped'])
+        for field, stats in report['fields'].items():
+            if stats['psi'] is not None:
+                gauges[f'drift_psi_{field}'] = stats['psi']
+    return app.response_class(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/cache', methods=['GET'])
+def cache_stats():
+    if cache is None:
+        return jsonify(enabled=False)
+    return jsonify(enabled=True, **cache.stats())
+
+@app.route('/admin/drift', methods=['GET'])
+def drift_report():
+    if drift is None:
+        return jsonify(enabled=False)
+    return jsonify(enabled=True, **drift.report(request.args.get('top', 10, type=int)))
+
+@app.route('/admin/price-table', methods=['GET'])
+def price_table_stats():
+    price_table = registry.active.price_table
+    if price_table is None:
+        return jsonify(enabled=False)
+    return jsonify(enabled=True, **price_table.stats())
+
+@app.route('/admin/model', methods=['GET'])
+def model_status():
+    return jsonify(registry.status())
+
+@app.route('/admin/model/reload', methods=['POST'])
+def model_reload():
+    # Check for a new version now instead of waiting for the next poll
+    reloaded = registry.check()
+    return jsonify(reloaded=reloaded, **registry.status())
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,129 @@
+"""Versioned model artifacts.
+
+Each version is a directory under an artifact root holding everything the
+server needs for one trained model, plus a manifest with checksums::
+
+    models/
+      20261018-120000/
+        manifest.json
+        random_forest_model.pkl
+        feature_columns.pkl
+        random_forest_arrays/   (optional, see forest_store.py)
+        price_table/            (optional, see price_table.py)
+
+Versions sort by name, so the newest one is the last. ``publish_version``
+writes a version into a temporary directory and renames it into place only
+once it is complete, so a watching server never sees half a version.
+
+    python artifacts.py publish random_forest_model.pkl feature_columns.pkl --root models --arrays
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+MANIFEST = 'manifest.json'
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def checksums(directory):
+    """sha256 of every file under ``directory`` (except the manifest), by relative path."""
+    sums = {}
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, directory).replace(os.sep, '/')
+            if rel != MANIFEST:
+                sums[rel] = file_sha256(path)
+    return sums
+
+
+def list_versions(root):
+    """Complete versions under ``root`` (those with a manifest), oldest first."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if not name.startswith('.') and os.path.isfile(os.path.join(root, name, MANIFEST)))
+
+
+def latest_version(root):
+    versions = list_versions(root)
+    return versions[-1] if versions else None
+
+
+def read_manifest(version_dir):
+    with open(os.path.join(version_dir, MANIFEST)) as f:
+        return json.load(f)
+
+
+def verify_version(version_dir):
+    """Raise ``ValueError`` if any file differs from the manifest checksums."""
+    expected = read_manifest(version_dir)['files']
+    actual = checksums(version_dir)
+    if actual != expected:
+        bad = sorted(name for name in set(expected) | set(actual) if expected.get(name) != actual.get(name))
+        raise ValueError(f"Checksum mismatch in {version_dir}: {', '.join(bad)}")
+    return expected
+
+
+def publish_version(root, model_path, feature_columns_path, version=None, arrays=False, extra_dirs=()):
+    """Copy a trained model and its feature columns into a new version directory.
+
+    With ``arrays=True`` the forest is also exported as memory-mappable
+    node arrays. ``extra_dirs`` are copied in as-is (e.g. a price table).
+    Returns the new version name.
+    """
+    version = version or time.strftime('%Y%m%d-%H%M%S')
+    final_dir = os.path.join(root, version)
+    if os.path.exists(final_dir):
+        raise FileExistsError(f"Version {version} already exists in {root}")
+    tmp_dir = os.path.join(root, f'.tmp-{version}')
+    os.makedirs(tmp_dir)
+
+    shutil.copy2(model_path, os.path.join(tmp_dir, 'random_forest_model.pkl'))
+    shutil.copy2(feature_columns_path, os.path.join(tmp_dir, 'feature_columns.pkl'))
+    if arrays:
+        import joblib
+        from forest_store import export_forest
+        export_forest(joblib.load(model_path), os.path.join(tmp_dir, 'random_forest_arrays'))
+    for extra in extra_dirs:
+        shutil.copytree(extra, os.path.join(tmp_dir, os.path.basename(os.path.normpath(extra))))
+
+    manifest = {'version': version, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'files': checksums(tmp_dir)}
+    with open(os.path.join(tmp_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(tmp_dir, final_dir)
+    return version
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manage versioned model artifacts.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    pub = sub.add_parser('publish', help="publish a trained model as a new version")
+    pub.add_argument('model', help="pickled RandomForestRegressor")
+    pub.add_argument('features', help="feature_columns.pkl saved with the model")
+    pub.add_argument('--root', default='models')
+    pub.add_argument('--version', help="version name (default: current timestamp)")
+    pub.add_argument('--arrays', action='store_true', help="also export memory-mappable forest arrays")
+    pub.add_argument('--extra', nargs='*', default=[], help="extra directories to include, e.g. price_table")
+
+    ls = sub.add_parser('list', help="list published versions")
+    ls.add_argument('--root', default='models')
+
+    args = parser.parse_args()
+    if args.command == 'publish':
+        version = publish_version(args.root, args.model, args.features, args.version, args.arrays, args.extra)
+        print(f"Published version {version} to {args.root}")
+    else:
+        for version in list_versions(args.root):
+            print(version)
@@ -0,0 +1,81 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Collects single-row predictions from concurrent requests into batches.
+
+    Request threads call ``predict(row)`` and block; a background thread
+    gathers rows for up to ``max_wait_ms`` milliseconds (or until
+    ``max_batch_size`` rows are waiting), scores them with one
+    ``predict_fn(matrix)`` call and hands each result back to its caller.
+
+    Only useful when one worker serves requests on several threads
+    (e.g. ``gunicorn -k gthread`` or the threaded dev server).
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Queue one encoded feature row; returns a Future for its prediction."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def predict(self, row, timeout=None):
+        return self.submit(row).result(timeout)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        # Block for the first row, then keep collecting until the batch is
+        # full or the wait window has passed
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            rows, futures = zip(*batch)
+            try:
+                predictions = self.predict_fn(np.vstack(rows))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, prediction in zip(futures, predictions):
+                future.set_result(prediction)
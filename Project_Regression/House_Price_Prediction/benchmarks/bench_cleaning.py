@@ -0,0 +1,85 @@
+"""Row-wise ``apply`` vs the vectorized parsers in cleaning.py.
+
+Tiles the raw ``size``, ``total_sqft`` and ``area_type`` columns of
+``Bengaluru_House_Data.csv`` up to ``--rows`` rows (10M by default), checks
+that the vectorized parsers give exactly the notebook's results and times
+both. The row-wise functions are timed on the first ``--apply-rows`` rows
+(``df.apply(get_area_type, axis=1)`` alone takes minutes at 10M) and
+extrapolated linearly.
+
+Run from the House_Price_Prediction folder::
+
+    python benchmarks/bench_cleaning.py --rows 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cleaning import (AREA_TYPE_NAMES, area_type_from_dummies, convert_size_to_int,  # noqa: E402
+                      convert_sqft_to_num, get_area_type, parse_size, parse_sqft)
+from encoder import AREA_TYPES  # noqa: E402
+
+
+def scaled_frame(path, rows):
+    raw = pd.read_csv(path)
+    reps = -(-rows // len(raw))
+    frame = pd.DataFrame({col: np.tile(raw[col].to_numpy(dtype=object), reps)[:rows]
+                          for col in ('size', 'total_sqft', 'area_type')})
+    # The one-hot area type columns get_area_type reads, as in the notebook
+    names = frame['area_type'].map(AREA_TYPE_NAMES)
+    for area in AREA_TYPES:
+        frame[area] = (names == area).astype(int)
+    return frame
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def same(a, b):
+    a, b = pd.Series(a).reset_index(drop=True), pd.Series(b).reset_index(drop=True)
+    if not (pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b)):
+        return a.astype(object).equals(b.astype(object))
+    return np.array_equal(a.to_numpy(dtype=float), b.to_numpy(dtype=float), equal_nan=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default='Bengaluru_House_Data.csv')
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--apply-rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    frame = scaled_frame(args.data, args.rows)
+    sample = frame.iloc[:min(args.apply_rows, args.rows)]
+    scale = len(frame) / len(sample)
+    area_frame = frame[AREA_TYPES]
+
+    cases = [
+        ('convert_size_to_int', lambda: sample['size'].apply(convert_size_to_int),
+         lambda df: parse_size(df['size']), lambda df: parse_size(df['size'], unique=False)),
+        ('convert_sqft_to_num', lambda: sample['total_sqft'].apply(convert_sqft_to_num),
+         lambda df: parse_sqft(df['total_sqft']), lambda df: parse_sqft(df['total_sqft'], unique=False)),
+        ('get_area_type', lambda: sample[AREA_TYPES].apply(get_area_type, axis=1),
+         lambda df: area_type_from_dummies(df[AREA_TYPES]), None),
+    ]
+
+    print(f"{len(frame):,} rows (row-wise apply timed on {len(sample):,} and scaled)\n")
+    print(f"{'parser':<22} {'apply s':>10} {'vector s':>10} {'speedup':>9} {'regex, all rows s':>18}")
+    for name, rowwise, vectorized, per_row in cases:
+        expected, apply_s = timed(rowwise)
+        apply_s *= scale
+        assert same(vectorized(sample), expected), f"{name}: vectorized result differs"
+        _, vector_s = timed(lambda: vectorized(frame if name != 'get_area_type' else area_frame))
+        per_row_s = float('nan')
+        if per_row is not None:
+            assert same(per_row(sample), expected), f"{name}: per-row regex result differs"
+            _, per_row_s = timed(lambda: per_row(frame))
+        print(f"{name:<22} {apply_s:>10.2f} {vector_s:>10.2f} {apply_s / vector_s:>8.0f}x {per_row_s:>18.2f}")
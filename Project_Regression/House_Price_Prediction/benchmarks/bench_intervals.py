@@ -0,0 +1,85 @@
+"""Cost of per-tree prediction intervals compared with a plain predict.
+
+Compares, for single rows and batches:
+
+* ``predict``: the mean only (sklearn and the flat-array forest)
+* ``interval``: mean plus P10/P90 from one vectorized pass over all trees,
+  with leaves found by the flat arrays or by sklearn's ``apply``
+* ``loop``: the naive version, calling ``predict`` on every estimator in Python
+
+Run from the House_Price_Prediction folder (needs the trained model)::
+
+    python benchmarks/bench_intervals.py --sizes 1 100 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from encoder import FeatureEncoder  # noqa: E402
+from forest_store import ArrayForest  # noqa: E402
+from bench_sparse import make_listings  # noqa: E402
+
+
+def best_time(fn, repeat):
+    """Best wall time of ``repeat`` calls, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def tree_loop(model, frame, quantiles):
+    per_tree = np.stack([est.predict(frame.values) for est in model.estimators_])
+    return per_tree.mean(axis=0), np.percentile(per_tree, quantiles, axis=0)
+
+
+def run(model, forest, encoder, n, quantiles, repeat):
+    X = encoder.encode_columns(**make_listings(encoder, n))
+    frame = encoder.to_frame(X)
+
+    # The vectorized interval must not change the mean
+    expected = model.predict(frame)
+    for kwargs in ({}, {'model': model}):
+        mean, _ = forest.predict_interval(frame if kwargs else X, quantiles, **kwargs)
+        assert np.array_equal(mean, expected)
+
+    timings = {
+        'sklearn predict': best_time(lambda: model.predict(frame), repeat),
+        'arrays predict': best_time(lambda: forest.predict(X), repeat),
+        'arrays interval': best_time(lambda: forest.predict_interval(X, quantiles), repeat),
+        'sklearn apply interval': best_time(lambda: forest.predict_interval(frame, quantiles, model), repeat),
+        'estimator loop': best_time(lambda: tree_loop(model, frame, quantiles), repeat),
+    }
+    if n == 1:
+        timings['arrays predict_one'] = best_time(lambda: forest.predict_one(X[0]), repeat)
+        timings['arrays predict_one_interval'] = best_time(
+            lambda: forest.predict_one_interval(X[0], quantiles), repeat)
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='random_forest_model.pkl')
+    parser.add_argument('--features', default='feature_columns.pkl')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 10_000])
+    parser.add_argument('--quantiles', type=float, nargs='+', default=[10, 90])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    forest = ArrayForest.from_estimator(model)
+    encoder = FeatureEncoder(joblib.load(args.features))
+
+    print(f"{'rows':>7} {'method':<28} {'ms':>10} {'vs sklearn predict':>19}")
+    for n in args.sizes:
+        timings = run(model, forest, encoder, n, args.quantiles, max(1, args.repeat if n < 10_000 else 3))
+        base = timings['sklearn predict']
+        for name, seconds in timings.items():
+            print(f"{n:>7} {name:<28} {seconds * 1000:>10.3f} {seconds / base:>18.2f}x")
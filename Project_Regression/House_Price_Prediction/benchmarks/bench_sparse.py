@@ -0,0 +1,76 @@
+"""Dense vs sparse (CSR) batch encoding: memory and throughput.
+
+Run from the House_Price_Prediction folder (needs the trained model)::
+
+    python benchmarks/bench_sparse.py --sizes 1000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from encoder import AREA_TYPES, FeatureEncoder  # noqa: E402
+
+
+def make_listings(encoder, n, seed=0):
+    """Random listings over the model's locations, as raw input columns."""
+    rng = np.random.default_rng(seed)
+    size = rng.integers(1, 7, n).astype(float)
+    return {
+        'size': size,
+        'total_sqft': rng.uniform(400, 4000, n).round(),
+        'bath': np.minimum(size + rng.integers(-1, 2, n), 6).clip(1),
+        'balcony': rng.integers(0, 4, n).astype(float),
+        'area_type': np.asarray(AREA_TYPES, dtype=object)[rng.integers(0, len(AREA_TYPES), n)],
+        'location': np.asarray(encoder.locations, dtype=object)[rng.integers(0, len(encoder.locations), n)],
+    }
+
+
+def matrix_bytes(X):
+    if sp.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def run(model, encoder, n, sparse):
+    columns = make_listings(encoder, n)
+    tracemalloc.start()
+    start = time.perf_counter()
+    X = encoder.encode_columns_sparse(**columns) if sparse else encoder.encode_columns(**columns)
+    encoded = time.perf_counter()
+    model.predict(encoder.to_frame(X))
+    done = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'rows': n,
+        'mode': 'sparse' if sparse else 'dense',
+        'matrix_mb': matrix_bytes(X) / 2**20,
+        'peak_mb': peak / 2**20,
+        'encode_rows_per_s': n / (encoded - start),
+        'total_rows_per_s': n / (done - start),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='random_forest_model.pkl')
+    parser.add_argument('--features', default='feature_columns.pkl')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    encoder = FeatureEncoder(joblib.load(args.features))
+
+    print(f"{'rows':>9} {'mode':>6} {'matrix MB':>10} {'peak MB':>9} {'encode rows/s':>14} {'total rows/s':>13}")
+    for n in args.sizes:
+        for sparse in (False, True):
+            r = run(model, encoder, n, sparse)
+            print(f"{r['rows']:>9} {r['mode']:>6} {r['matrix_mb']:>10.1f} {r['peak_mb']:>9.1f} "
+                  f"{r['encode_rows_per_s']:>14,.0f} {r['total_rows_per_s']:>13,.0f}")
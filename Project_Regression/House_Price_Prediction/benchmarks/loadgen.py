@@ -0,0 +1,238 @@
+"""Concurrent load generator for a running server.
+
+Replays realistic ``/predict`` form submissions (locations, sizes, areas
+etc. drawn from ``Bengaluru_House_Data.csv``) from a pool of client
+threads and reports, per load step, throughput, latency percentiles,
+error rate and where the server saturates.
+
+Two ways to apply load:
+
+* ``--rates 50 100 200``: open loop. Requests arrive as a Poisson process
+  at each rate (requests/s), whether or not earlier ones have finished.
+  Latency is measured from the scheduled arrival, so queueing in front of
+  a saturated server is counted (no coordinated omission). ``--clients``
+  caps the number of requests in flight.
+* ``--clients 50 100 500`` without ``--rates``: closed loop. That many
+  clients each send a request as soon as their previous one returns.
+
+A step is saturated when it completes less than 90% of the offered rate,
+its p99 exceeds ``--slo-ms`` or more than 1% of requests fail. Start the
+server in the configuration to test (or let ``--launch`` start it)::
+
+    FLASK_MICRO_BATCHING=true gunicorn -w 4 --threads 8 app:app
+    python benchmarks/loadgen.py --url http://127.0.0.1:8000 --rates 50 100 200 400 --clients 500
+
+    python benchmarks/loadgen.py --launch "gunicorn -w 2 -b 127.0.0.1:8000 app:app" \\
+        --env FLASK_INFERENCE_ENGINE=arrays --clients 50 100 200 500 --output arrays.json
+
+Streamlit apps run their scripts over a websocket session, so there is
+no form endpoint to replay; ``--path /_stcore/health --method GET``
+still measures how responsive a Streamlit server stays under load.
+"""
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cleaning import clean_listings  # noqa: E402
+
+
+def sample_forms(path, n, seed=0):
+    """``n`` form submissions drawn from the raw listings, as the browser would send them."""
+    listings = clean_listings(pd.read_csv(path, dtype=str))
+    listings = listings.iloc[np.random.default_rng(seed).integers(0, len(listings), n)]
+    listings['size'] = listings['size'].astype(int)
+    return [urllib.parse.urlencode({k: str(v) for k, v in row.items()}).encode()
+            for row in listings.to_dict('records')]
+
+
+class LoadStep:
+    """Sends requests for one step and collects their outcomes."""
+
+    def __init__(self, url, method, bodies, timeout):
+        self.url = url
+        self.method = method
+        self.bodies = bodies
+        self.timeout = timeout
+        self.latencies = []
+        self.errors = {}
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def _body(self):
+        with self._lock:
+            self._next += 1
+            return self.bodies[self._next % len(self.bodies)]
+
+    def send(self, scheduled=None):
+        start = time.perf_counter()
+        error = None
+        try:
+            data = self._body() if self.method == 'POST' else None
+            with urllib.request.urlopen(urllib.request.Request(self.url, data=data, method=self.method),
+                                        timeout=self.timeout) as response:
+                body = response.read()
+            # The form page reports failures inside a 200 response
+            if self.method == 'POST' and b'Predicted Price' not in body:
+                error = 'no prediction in response'
+        except urllib.error.HTTPError as e:
+            error = f'HTTP {e.code}'
+        except Exception as e:
+            error = type(e).__name__
+        latency = time.perf_counter() - (scheduled if scheduled is not None else start)
+        with self._lock:
+            if error is None:
+                self.latencies.append(latency)
+            else:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+    def closed_loop(self, clients, duration):
+        deadline = time.perf_counter() + duration
+
+        def client():
+            while time.perf_counter() < deadline:
+                self.send()
+
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def open_loop(self, rate, clients, duration, seed=0):
+        rng = np.random.default_rng(seed)
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            start = time.perf_counter()
+            arrival = start
+            while True:
+                arrival += rng.exponential(1 / rate)
+                if arrival - start > duration:
+                    break
+                delay = arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.send, arrival)
+
+    def report(self, elapsed, offered=None):
+        ok = np.asarray(self.latencies) * 1000
+        failed = sum(self.errors.values())
+        total = len(ok) + failed
+        result = {
+            'requests': total,
+            'throughput_rps': len(ok) / elapsed,
+            'error_rate': failed / total if total else 0.0,
+            'errors': self.errors,
+        }
+        if offered is not None:
+            result['offered_rps'] = offered
+        if len(ok):
+            result.update({f'p{q}_ms': float(np.percentile(ok, q)) for q in (50, 90, 99)})
+            result['max_ms'] = float(ok.max())
+        return result
+
+
+def is_saturated(result, slo_ms):
+    if result['error_rate'] > 0.01:
+        return True
+    if result.get('p99_ms', float('inf')) > slo_ms:
+        return True
+    offered = result.get('offered_rps')
+    return offered is not None and result['throughput_rps'] < 0.9 * offered
+
+
+def wait_until_up(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2).close()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--path', default='/predict')
+    parser.add_argument('--method', default='POST', choices=['GET', 'POST'])
+    parser.add_argument('--data', default='Bengaluru_House_Data.csv')
+    parser.add_argument('--rates', type=float, nargs='*', help="open-loop arrival rates in requests/s")
+    parser.add_argument('--clients', type=int, nargs='+', default=[50, 100, 200, 500],
+                        help="closed-loop client counts, or the in-flight cap for --rates")
+    parser.add_argument('--duration', type=float, default=20, help="seconds per step")
+    parser.add_argument('--warmup', type=float, default=3, help="seconds of load before the first step")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--slo-ms', type=float, default=500, help="p99 above this counts as saturated")
+    parser.add_argument('--launch', help="command that starts the server (stopped at the end)")
+    parser.add_argument('--env', nargs='*', default=[], help="KEY=VALUE settings for --launch")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    server = None
+    if args.launch:
+        env = dict(os.environ, **dict(item.split('=', 1) for item in args.env))
+        server = subprocess.Popen(shlex.split(args.launch), env=env, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+        wait_until_up(args.url + '/')
+
+    try:
+        url = args.url + args.path
+        bodies = sample_forms(args.data, 5000) if args.method == 'POST' else [None]
+        if args.warmup:
+            LoadStep(url, args.method, bodies, args.timeout).closed_loop(min(args.clients), args.warmup)
+
+        if args.rates:
+            plan = [('open', rate, max(args.clients)) for rate in args.rates]
+        else:
+            plan = [('closed', None, clients) for clients in args.clients]
+
+        steps = []
+        saturation = None
+        print(f"{'mode':<7} {'rate':>7} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+              f"{'p99 ms':>8} {'errors':>7}")
+        for mode, rate, clients in plan:
+            step = LoadStep(url, args.method, bodies, args.timeout)
+            start = time.perf_counter()
+            if mode == 'open':
+                step.open_loop(rate, clients, args.duration)
+            else:
+                step.closed_loop(clients, args.duration)
+            result = step.report(time.perf_counter() - start, offered=rate)
+            result.update({'mode': mode, 'clients': clients, 'saturated': is_saturated(result, args.slo_ms)})
+            steps.append(result)
+            print(f"{mode:<7} {rate or '-':>7} {clients:>7} {result['throughput_rps']:>8.1f} "
+                  f"{result.get('p50_ms', float('nan')):>8.1f} {result.get('p90_ms', float('nan')):>8.1f} "
+                  f"{result.get('p99_ms', float('nan')):>8.1f} {result['error_rate']:>7.1%}")
+            if result['saturated'] and saturation is None:
+                saturation = result
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    healthy = [s for s in steps if not s['saturated']]
+    if saturation is None:
+        print("\nNo saturation within the tested load")
+    else:
+        point = f"{saturation['offered_rps']} req/s" if saturation['mode'] == 'open' \
+            else f"{saturation['clients']} clients"
+        print(f"\nSaturated at {point}; peak healthy throughput "
+              f"{max((s['throughput_rps'] for s in healthy), default=0):.1f} req/s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'url': url, 'launch': args.launch, 'env': args.env, 'slo_ms': args.slo_ms,
+                       'steps': steps, 'saturated_at': saturation and steps.index(saturation)}, f, indent=2)
@@ -0,0 +1,224 @@
+"""Latency / throughput benchmark suite for the house price predictor.
+
+Scores rows sampled from ``Bengaluru_House_Data.csv`` (cleaned like the
+notebook) through the app's own functions and through the Flask test
+client, and measures:
+
+* single predictions: p50/p99 latency, direct (``predict_price``) and via ``POST /predict``
+* batches of 1 to 100k rows: latency, rows/s and peak traced memory,
+  direct (encode + predict) and via ``POST /api/predict/batch``
+* model load: cold (fresh interpreter) and warm (already imported, files in page cache)
+
+Results are written as JSON. ``--compare`` checks them against an earlier
+run and exits with status 1 if any latency grew or throughput dropped by
+more than ``--threshold``. Run from the House_Price_Prediction folder::
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --output new.json --compare bench.json --threshold 0.2
+
+App settings can be changed with the usual FLASK_* variables, e.g.
+``FLASK_INFERENCE_ENGINE=arrays``. The prediction cache is always off so
+repeated rows are really scored.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+os.environ['FLASK_PREDICTION_CACHE_SIZE'] = '0'
+
+from cleaning import clean_listings  # noqa: E402
+
+# Lower is better for these metrics, higher is better for the rest
+LATENCY_METRICS = ('p50_ms', 'p99_ms', 'mean_ms', 'seconds', 'peak_mb')
+THROUGHPUT_METRICS = ('rows_per_s',)
+
+# App settings load_bundle reads; the cold-load interpreter gets them as JSON
+LOAD_CONFIG_KEYS = ['MODEL_FORMAT', 'MODEL_ARRAYS_DIR', 'INFERENCE_ENGINE', 'PREDICTION_INTERVALS',
+                    'PRICE_TABLE_DIR', 'PRICE_TABLE_INTERPOLATE', 'MICRO_BATCHING',
+                    'MICRO_BATCH_MAX_SIZE', 'MICRO_BATCH_MAX_WAIT_MS']
+
+
+def sample_rows(path, n, seed=0):
+    """``n`` cleaned listings drawn (with replacement) from the raw dataset."""
+    listings = clean_listings(pd.read_csv(path, dtype=str))
+    rng = np.random.default_rng(seed)
+    return listings.iloc[rng.integers(0, len(listings), n)].reset_index(drop=True)
+
+
+def summarize(times, rows=1):
+    times = np.asarray(times)
+    return {
+        'runs': len(times),
+        'p50_ms': float(np.percentile(times, 50) * 1000),
+        'p99_ms': float(np.percentile(times, 99) * 1000),
+        'mean_ms': float(times.mean() * 1000),
+        'rows_per_s': float(rows / times.mean()),
+    }
+
+
+def timed(fn, runs, warmup=1):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def peak_memory_mb(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def bench_single(app_module, rows, runs):
+    client = app_module.app.test_client()
+    records = rows.to_dict('records')[:runs]
+    forms = [{k: str(v) for k, v in r.items()} for r in records]
+
+    it = iter(records * 2)
+    direct = timed(lambda: app_module.predict_price(next(it)), len(records))
+    it_form = iter(forms * 2)
+    http = timed(lambda: client.post('/predict', data=next(it_form)), len(forms))
+    return {'single_direct': summarize(direct), 'single_http': summarize(http)}
+
+
+def bench_batches(app_module, rows, sizes, http_max, budget_s):
+    results = {}
+    client = app_module.app.test_client()
+    bundle = app_module.registry.active
+    encoder, model = bundle.encoder, bundle.model
+    for n in sizes:
+        batch = rows.iloc[:n]
+        direct = lambda: model.predict(encoder.to_frame(encoder.encode(batch)))  # noqa: E731
+        # Enough runs for stable percentiles, without spending minutes on the big batches
+        first = timed(direct, 1)[0]
+        runs = int(max(3, min(100, budget_s / max(first, 1e-6))))
+        result = summarize(timed(direct, runs, warmup=0), rows=n)
+        result['peak_mb'] = peak_memory_mb(direct)
+        results[f'batch_direct_{n}'] = result
+
+        if n <= http_max:
+            payload = batch.to_dict('records')
+            post = lambda: client.post('/api/predict/batch', json=payload)  # noqa: E731
+            first = timed(post, 1)[0]
+            runs = int(max(3, min(100, budget_s / max(first, 1e-6))))
+            results[f'batch_http_{n}'] = summarize(timed(post, runs, warmup=0), rows=n)
+    return results
+
+
+def bench_load(app_module, runs):
+    # Cold: one load_bundle call in a fresh interpreter. Importing app would load the
+    # model a second time, so only model_registry is imported, with the app's settings
+    config = json.dumps({key: app_module.app.config[key] for key in LOAD_CONFIG_KEYS})
+    script = ("import json, sys, time; from model_registry import load_bundle; "
+              "config = json.loads(sys.argv[1]); start = time.perf_counter(); "
+              "load_bundle('.', config, 'bench'); print(time.perf_counter() - start)")
+    cold = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', script, config], capture_output=True, text=True, check=True,
+                             env=dict(os.environ, PYTHONPATH=HERE))
+        cold.append(float(out.stdout.strip().splitlines()[-1]))
+
+    # Warm: modules imported, model files already in the page cache
+    load = lambda: app_module.load_bundle('.', app_module.app.config, 'bench')  # noqa: E731
+    warm = timed(load, runs, warmup=0)
+    result = {'load_cold': {'runs': runs, 'seconds': float(np.median(cold))},
+              'load_warm': {'runs': runs, 'seconds': float(np.median(warm))}}
+    result['load_warm']['peak_mb'] = peak_memory_mb(load)
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Metrics that got worse than ``baseline`` by more than ``threshold`` (a fraction)."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            if not old:
+                continue
+            if metric in LATENCY_METRICS and value > old * (1 + threshold):
+                regressions.append(f"{name}.{metric}: {old:.4g} -> {value:.4g} (+{value / old - 1:.0%})")
+            elif metric in THROUGHPUT_METRICS and value < old * (1 - threshold):
+                regressions.append(f"{name}.{metric}: {old:.4g} -> {value:.4g} ({value / old - 1:.0%})")
+    return regressions
+
+
+def environment(config):
+    import sklearn
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=HERE).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'cpus': os.cpu_count(),
+        'config': {key: config[key] for key in ('MODEL_FORMAT', 'INFERENCE_ENGINE', 'MICRO_BATCHING',
+                                                'BATCH_SPARSE', 'PRICE_TABLE_DIR', 'PREDICTION_INTERVALS')},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default='Bengaluru_House_Data.csv')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1_000, 10_000, 100_000])
+    parser.add_argument('--single-runs', type=int, default=500)
+    parser.add_argument('--http-max-batch', type=int, default=10_000,
+                        help="largest batch also sent through the test client")
+    parser.add_argument('--budget', type=float, default=3.0, help="seconds to spend per batch size")
+    parser.add_argument('--load-runs', type=int, default=3)
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON from an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed relative slowdown before --compare fails (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    import app as app_module
+
+    rows = sample_rows(args.data, max(max(args.sizes), args.single_runs))
+    results = {}
+    results.update(bench_single(app_module, rows, args.single_runs))
+    results.update(bench_batches(app_module, rows, args.sizes, args.http_max_batch, args.budget))
+    results.update(bench_load(app_module, args.load_runs))
+
+    print(f"{'benchmark':<22} {'p50 ms':>10} {'p99 ms':>10} {'rows/s':>12} {'peak MB':>9}")
+    for name, r in results.items():
+        p50 = r.get('p50_ms', r.get('seconds', 0) * 1000)
+        print(f"{name:<22} {p50:>10.3f} {r.get('p99_ms', p50):>10.3f} "
+              f"{r.get('rows_per_s', 0):>12,.0f} {r.get('peak_mb', float('nan')):>9.1f}")
+
+    report = {'environment': environment(app_module.app.config), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} vs {args.compare}:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} vs {args.compare}")
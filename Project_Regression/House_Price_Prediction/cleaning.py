@@ -0,0 +1,135 @@
+"""Cleaning of raw listings in the ``Bengaluru_House_Data.csv`` schema.
+
+Applies the notebook's preprocessing to raw rows so they can be fed to
+``FeatureEncoder``: ``size`` strings like ``'2 BHK'`` become integers,
+``total_sqft`` ranges like ``'1000 - 1200'`` become their midpoint, area
+types get the renamed column names and missing values are filled with the
+training data's medians (location with its mode).
+
+``convert_size_to_int``, ``convert_sqft_to_num`` and ``get_area_type`` are
+the notebook's row-wise functions. ``parse_size``, ``parse_sqft`` and
+``area_type_from_dummies`` give the same results for a whole column at
+once: the string parsing is done with pandas string accessors and regex
+extraction, on the distinct values only (raw columns repeat a few
+thousand values at most), and mapped back to the rows with NumPy.
+"""
+import numpy as np
+import pandas as pd
+
+from encoder import AREA_TYPES, INPUT_FIELDS
+
+# Raw columns needed for scoring (availability, society and price are ignored)
+RAW_COLUMNS = ['area_type', 'location', 'size', 'total_sqft', 'bath', 'balcony']
+
+# Raw area_type values -> the one-hot column names the model was trained with
+AREA_TYPE_NAMES = {
+    'Built-up  Area': 'Built_up_Area',
+    'Carpet  Area': 'Carpet_Area',
+    'Plot  Area': 'Plot_Area',
+    'Super built-up  Area': 'Super_built_up_Area',
+}
+
+# Medians (location: mode) of Bengaluru_House_Data.csv, as filled in by the notebook
+TRAINING_FILLS = {'size': 3.0, 'total_sqft': 1276.0, 'bath': 2.0, 'balcony': 2.0, 'location': 'Whitefield'}
+
+
+def convert_size_to_int(bhk):
+    if isinstance(bhk, str):
+        parts = bhk.split(' ')
+        if len(parts) > 1 and parts[0].isdigit():
+            return int(parts[0])
+    return None
+
+
+def convert_sqft_to_num(x):
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        if isinstance(x, str):
+            tokens = x.split('-')
+            if len(tokens) == 2:
+                try:
+                    return (float(tokens[0]) + float(tokens[1])) / 2
+                except ValueError:
+                    pass
+    return None
+
+
+def get_area_type(row, area_types=AREA_TYPES):
+    for area in area_types:
+        if row[area] == 1:
+            return area.replace('area_type_', '')
+    return 'Unknown'
+
+
+def _per_unique(values, parse, unique=True):
+    # Parse each distinct value once and broadcast the results back to the rows
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values, dtype=object)
+    if not unique:
+        return pd.Series(parse(values).to_numpy(dtype=float), index=values.index)
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype=object)).to_numpy(dtype=float)
+    # Missing values get code -1, which picks the trailing NaN
+    return pd.Series(np.append(parsed, np.nan)[codes], index=values.index)
+
+
+def _to_float(values):
+    # float() also accepts digit group underscores ('1_000'); to_numeric does not
+    stripped = values.str.replace(r'(?<=\d)_(?=\d)', '', regex=True)
+    return pd.to_numeric(stripped.fillna(values), errors='coerce')
+
+
+def _parse_size(values):
+    # '2 BHK' -> 2: the text before the first space, if it is all digits
+    return pd.to_numeric(values.str.extract(r'^(\d+) ', expand=False), errors='coerce')
+
+
+def _parse_sqft(values):
+    # Plain numbers first, then 'a - b' ranges (exactly one dash) as their midpoint
+    number = _to_float(values)
+    bounds = values.str.extract(r'^([^-]*)-([^-]*)$')
+    midpoint = (_to_float(bounds[0]) + _to_float(bounds[1])) / 2
+    return number.fillna(midpoint)
+
+
+def parse_size(values, unique=True):
+    """Vectorized ``convert_size_to_int`` over a column (float, NaN if unparsable)."""
+    return _per_unique(values, _parse_size, unique)
+
+
+def parse_sqft(values, unique=True):
+    """Vectorized ``convert_sqft_to_num`` over a column (float, NaN if unparsable)."""
+    return _per_unique(values, _parse_sqft, unique)
+
+
+def area_type_from_dummies(frame, area_types=AREA_TYPES):
+    """Vectorized ``get_area_type``: the first area type column set to 1, else ``'Unknown'``."""
+    hits = frame[area_types].to_numpy() == 1
+    names = np.asarray([area.replace('area_type_', '') for area in area_types], dtype=object)
+    return pd.Series(np.where(hits.any(axis=1), names[hits.argmax(axis=1)], 'Unknown'), index=frame.index)
+
+
+def clean_listings(raw, fills=TRAINING_FILLS):
+    """Turn raw CSV rows into ``INPUT_FIELDS`` columns ready for the encoder.
+
+    ``raw`` is a DataFrame read with ``dtype=str``; the index is kept.
+    Values the notebook could not parse are filled like missing ones.
+    """
+    missing = [col for col in RAW_COLUMNS if col not in raw.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    clean = pd.DataFrame(index=raw.index)
+    clean['size'] = parse_size(raw['size'])
+    clean['total_sqft'] = parse_sqft(raw['total_sqft'])
+    clean['bath'] = pd.to_numeric(raw['bath'], errors='coerce')
+    clean['balcony'] = pd.to_numeric(raw['balcony'], errors='coerce')
+    for field in ('size', 'total_sqft', 'bath', 'balcony'):
+        clean[field] = clean[field].where(np.isfinite(clean[field]), fills[field])
+
+    # Unknown area types are passed through and encode as no area type column
+    area_type = raw['area_type'].astype(object)
+    clean['area_type'] = area_type.map(AREA_TYPE_NAMES).fillna(area_type)
+    clean['location'] = raw['location'].astype(object).fillna(fills['location'])
+    return clean[INPUT_FIELDS]
@@ -0,0 +1,194 @@
+"""Shrink the random forest into a compact, memory-mappable artifact.
+
+``random_forest_model.pkl`` keeps float64 thresholds and values, int64
+child pointers and per-node bookkeeping (impurity, sample counts, missing
+value routing) that prediction never reads. ``compact`` starts from the
+flat ``ArrayForest`` arrays and:
+
+* stores thresholds as float32. Features are compared as float32 anyway,
+  so rounding every threshold down to the nearest float32 gives exactly the
+  same decisions.
+* stores leaf values as float32 (``--value-dtype float64`` keeps them
+  exact). Predictions move by around 1e-7 relative.
+* narrows feature indices to the smallest integer type that fits and child
+  pointers to int32.
+* optionally keeps only the first ``--n-trees`` trees and/or caps the depth
+  at ``--max-depth``. Nodes at the cap become leaves predicting their mean
+  and the nodes below them are dropped.
+
+The result is written like ``export_forest`` (load it with
+``MODEL_FORMAT=arrays``), together with ``report.json``. The report
+compares size on disk and in memory, load time, inference speed and test
+accuracy with the original model::
+
+    python compact_forest.py random_forest_model.pkl random_forest_compact --max-depth 20
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from forest_store import ArrayForest, export_forest, load_forest
+
+
+def float32_thresholds(threshold):
+    """Round thresholds down to float32 without changing any float32 comparison."""
+    rounded = threshold.astype(np.float32)
+    too_high = rounded > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def node_depths(forest):
+    """Depth of every node reachable from a root (-1 for nodes that are not)."""
+    depth = np.full(len(forest.value), -1, dtype=np.int32)
+    frontier = np.asarray(forest.roots)
+    level = 0
+    while frontier.size:
+        depth[frontier] = level
+        internal = frontier[forest.left[frontier] != frontier]
+        frontier = np.concatenate([forest.left[internal], forest.right[internal]])
+        level += 1
+    return depth
+
+
+def compact(forest, value_dtype=np.float32, max_depth=None, n_trees=None):
+    """Return a smaller copy of ``forest`` (an ``ArrayForest``)."""
+    roots = np.asarray(forest.roots)
+    n_nodes = len(forest.value)
+    if n_trees is not None and n_trees < len(roots):
+        n_nodes = int(roots[n_trees])
+        roots = roots[:n_trees]
+    feature = np.asarray(forest.feature[:n_nodes])
+    threshold = np.asarray(forest.threshold[:n_nodes])
+    left = np.asarray(forest.left[:n_nodes])
+    right = np.asarray(forest.right[:n_nodes])
+    value = np.asarray(forest.value[:n_nodes])
+    depth_limit = forest.max_depth
+
+    keep = np.ones(n_nodes, dtype=bool)
+    if max_depth is not None and max_depth < forest.max_depth:
+        subset = ArrayForest(feature, threshold, left, right, value, roots, forest.max_depth, forest.n_features)
+        depth = node_depths(subset)
+        ids = np.arange(n_nodes)
+        # Nodes at the cap become leaves (their value is already the mean of their samples)
+        cut = depth == max_depth
+        left, right = np.where(cut, ids, left), np.where(cut, ids, right)
+        threshold = np.where(cut, np.inf, threshold)
+        feature = np.where(cut, 0, feature)
+        keep = (depth >= 0) & (depth <= max_depth)
+        depth_limit = max_depth
+
+    # Renumber the surviving nodes; trees stay contiguous and in order
+    new_id = np.cumsum(keep) - 1
+    feature_dtype = np.min_scalar_type(max(forest.n_features - 1, 0))
+    return ArrayForest(
+        feature=feature[keep].astype(feature_dtype),
+        threshold=float32_thresholds(np.asarray(threshold[keep], dtype=np.float64)),
+        left=new_id[left[keep]].astype(np.int32),
+        right=new_id[right[keep]].astype(np.int32),
+        value=value[keep].astype(value_dtype),
+        roots=new_id[roots].astype(np.int32),
+        max_depth=int(depth_limit),
+        n_features=forest.n_features,
+        feature_names=forest.feature_names,
+    )
+
+
+def forest_nbytes(forest):
+    return sum(np.asarray(getattr(forest, name)).nbytes
+               for name in ('feature', 'threshold', 'left', 'right', 'value', 'roots'))
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(dirpath, name))
+               for dirpath, _, names in os.walk(path) for name in names)
+
+
+def best_time(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def compare(model_path, model, compact_dir, forest, X_test, y_test):
+    """Size, load time, speed and accuracy of the compact forest vs the pickled model."""
+    import joblib
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    X = np.asarray(X_test, dtype=np.float64)
+    original = model.predict(X_test)
+    compacted = forest.predict(X)
+    single = X[:200]
+
+    def summary(pred):
+        return {'r2': float(r2_score(y_test, pred)), 'mae': float(mean_absolute_error(y_test, pred))}
+
+    flat = ArrayForest.from_estimator(model)
+    return {
+        'nodes': {'original': len(flat.value), 'compact': len(forest.value)},
+        'trees': {'original': flat.n_estimators, 'compact': forest.n_estimators},
+        'max_depth': {'original': int(flat.max_depth), 'compact': int(forest.max_depth)},
+        'disk_mb': {'pickle': os.path.getsize(model_path) / 2**20, 'compact': dir_size(compact_dir) / 2**20},
+        'memory_mb': {'flat_float64': forest_nbytes(flat) / 2**20, 'compact': forest_nbytes(forest) / 2**20},
+        'load_seconds': {
+            'pickle': best_time(lambda: joblib.load(model_path), 3),
+            'compact_mmap': best_time(lambda: load_forest(compact_dir), 3),
+            'compact_in_memory': best_time(lambda: load_forest(compact_dir, mmap_mode=None), 3),
+        },
+        'batch_ms': {
+            'sklearn': best_time(lambda: model.predict(X_test)) * 1000,
+            'compact': best_time(lambda: forest.predict(X)) * 1000,
+        },
+        'single_row_us': {
+            'flat_float64': best_time(lambda: [flat.predict_one(x) for x in single]) / len(single) * 1e6,
+            'compact': best_time(lambda: [forest.predict_one(x) for x in single]) / len(single) * 1e6,
+        },
+        'accuracy': {
+            'original': summary(original),
+            'compact': summary(compacted),
+            'max_abs_prediction_change': float(np.abs(compacted - original).max()),
+            'mean_abs_prediction_change': float(np.abs(compacted - original).mean()),
+        },
+    }
+
+
+def test_split(data_path, feature_columns, test_size=0.2, seed=42):
+    """The training pipeline's held-out rows (see train.py)."""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from train import build_features, clean
+
+    X, y = build_features(clean(pd.read_csv(data_path)))
+    _, X_test, _, y_test = train_test_split(X, y, test_size=test_size, random_state=seed)
+    return X_test[feature_columns], y_test
+
+
+if __name__ == '__main__':
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Write a compact copy of the random forest and compare it.")
+    parser.add_argument('model', help="pickled RandomForestRegressor, e.g. random_forest_model.pkl")
+    parser.add_argument('output', help="directory for the compact node arrays and report.json")
+    parser.add_argument('--value-dtype', default='float32', choices=['float32', 'float64'])
+    parser.add_argument('--max-depth', type=int, help="turn nodes deeper than this into leaves")
+    parser.add_argument('--n-trees', type=int, help="keep only the first N trees")
+    parser.add_argument('--data', default='Bengaluru_House_Data.csv', help="CSV used to rebuild the test split")
+    parser.add_argument('--features', default='feature_columns.pkl')
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    forest = compact(ArrayForest.from_estimator(model), np.dtype(args.value_dtype), args.max_depth, args.n_trees)
+    export_forest(forest, args.output)
+
+    X_test, y_test = test_split(args.data, joblib.load(args.features))
+    report = compare(args.model, model, args.output, load_forest(args.output), X_test, y_test)
+    report['settings'] = {'value_dtype': args.value_dtype, 'max_depth': args.max_depth, 'n_trees': args.n_trees}
+    with open(os.path.join(args.output, 'report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
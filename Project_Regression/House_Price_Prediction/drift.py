@@ -0,0 +1,297 @@
+"""Streaming drift monitor for live prediction inputs.
+
+Every request hands its raw input to ``DriftMonitor.observe``, which only
+queues it. The queue is bounded by rows: inputs that don't fit are dropped
+and counted, and a batch larger than the room left is subsampled. A
+background thread computes each batch's sketch increments on its own and
+only merges them under the lock that ``report()`` takes, so a large batch
+does not hold up ``/metrics``. The sketches have a fixed size:
+
+* numeric fields (``total_sqft``, ``bath``): a log-bucket quantile sketch
+  (DDSketch-style, 1% relative error, at most ``max_buckets`` buckets) plus
+  counts over the baseline's decile bins
+* categorical fields (``location``, ``area_type``): a count-min sketch for
+  per-value frequencies and Space-Saving counters for the heavy hitters
+
+``report()`` compares them with a baseline computed once from the training
+CSV: the population stability index (PSI) per field, live vs training
+quantiles, the top live values and the share of values outside the
+training's most frequent ones. Memory stays constant however many
+requests are observed.
+
+Build the baseline once::
+
+    python drift.py Bengaluru_House_Data.csv drift_baseline.json
+"""
+import argparse
+import json
+import math
+import queue
+import threading
+
+import numpy as np
+
+NUMERIC_FIELDS = ['total_sqft', 'bath']
+CATEGORICAL_FIELDS = ['location', 'area_type']
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+class QuantileSketch:
+    """Quantiles with bounded relative error from log-spaced buckets."""
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def bucket_counts(self, values):
+        """Bucket keys and counts for ``values`` plus how many are <= 0, for ``merge``."""
+        values = np.asarray(values, dtype=float)
+        positive = values[values > 0]
+        keys, counts = np.unique(np.ceil(np.log(positive) / self.log_gamma).astype(np.int64), return_counts=True)
+        return keys, counts, int((values <= 0).sum())
+
+    def merge(self, keys, counts, zero_count):
+        self.zero_count += zero_count
+        self.count += zero_count + int(counts.sum())
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            # Fold the lowest buckets into the next one; only the smallest values lose precision
+            keys = sorted(self.buckets)
+            excess = len(keys) - self.max_buckets
+            self.buckets[keys[excess]] += sum(self.buckets.pop(key) for key in keys[:excess])
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            # Merge the two lowest buckets; only the smallest values lose precision
+            lowest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(lowest)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class CountMinSketch:
+    """Approximate counts of arbitrary values in ``width * depth`` counters."""
+
+    def __init__(self, width=2048, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _cells(self, item):
+        return [hash((row, item)) % self.width for row in range(self.depth)]
+
+    def add(self, item, count=1):
+        self.table[np.arange(self.depth), self._cells(item)] += count
+
+    def delta(self, items, counts):
+        """The counters ``items`` (seen ``counts`` times) add, as a table for ``merge``."""
+        delta = np.zeros_like(self.table)
+        rows = np.arange(self.depth)
+        for item, count in zip(items, counts):
+            delta[rows, self._cells(item)] += count
+        return delta
+
+    def merge(self, delta):
+        self.table += delta
+
+    def estimate(self, item):
+        return int(self.table[np.arange(self.depth), self._cells(item)].min())
+
+
+class HeavyHitters:
+    """Space-Saving: the ``k`` most frequent values with overestimated counts."""
+
+    def __init__(self, k=50):
+        self.k = k
+        self.counts = {}
+
+    def add(self, item, count=1):
+        if item in self.counts or len(self.counts) < self.k:
+            self.counts[item] = self.counts.get(item, 0) + count
+            return
+        # Replace the smallest counter; the newcomer inherits its count
+        smallest = min(self.counts, key=self.counts.get)
+        self.counts[item] = self.counts.pop(smallest) + count
+
+    def top(self, n=10):
+        return sorted(self.counts.items(), key=lambda kv: -kv[1])[:n]
+
+
+def psi(expected, actual, eps=1e-4):
+    """Population stability index between two frequency vectors."""
+    e = np.asarray(expected, dtype=float)
+    a = np.asarray(actual, dtype=float)
+    e = np.maximum(e / max(e.sum(), 1), eps)
+    a = np.maximum(a / max(a.sum(), 1), eps)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def build_baseline(listings, bins=10, top_values=50):
+    """Training distribution of the monitored fields (``listings`` as cleaned by clean_listings).
+
+    Numeric fields get decile bins; categorical fields keep their
+    ``top_values`` most frequent values, the rest count as "other".
+    """
+    baseline = {'rows': int(len(listings)), 'numeric': {}, 'categorical': {}}
+    for field in NUMERIC_FIELDS:
+        values = listings[field].to_numpy(dtype=float)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+        baseline['numeric'][field] = {
+            'edges': edges.tolist(),
+            'fractions': (counts / counts.sum()).tolist(),
+            'quantiles': dict(zip(map(str, QUANTILES), np.quantile(values, QUANTILES).tolist())),
+        }
+    for field in CATEGORICAL_FIELDS:
+        fractions = listings[field].value_counts(normalize=True)
+        baseline['categorical'][field] = fractions.iloc[:top_values].to_dict()
+    return baseline
+
+
+class DriftMonitor:
+    """Sketches of live inputs, updated off the request path."""
+
+    def __init__(self, baseline, queue_size=10_000):
+        self.baseline = baseline
+        # Maximum number of input rows waiting to be sketched
+        self.queue_size = queue_size
+        self.observed = 0
+        self.dropped = 0
+        self.quantiles = {field: QuantileSketch() for field in NUMERIC_FIELDS}
+        self.bins = {field: np.zeros(len(spec['edges']) + 1, dtype=np.int64)
+                     for field, spec in baseline['numeric'].items()}
+        self.edges = {field: np.asarray(spec['edges']) for field, spec in baseline['numeric'].items()}
+        self.frequencies = {field: CountMinSketch() for field in CATEGORICAL_FIELDS}
+        self.heavy_hitters = {field: HeavyHitters() for field in CATEGORICAL_FIELDS}
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='drift-monitor', daemon=True)
+        self._thread.start()
+
+    def observe(self, raw_input):
+        """Queue one raw input dict (or a DataFrame of validated listings); never blocks."""
+        n = 1 if isinstance(raw_input, dict) else len(raw_input)
+        with self._pending_lock:
+            room = self.queue_size - self._pending
+            if room <= 0:
+                self.dropped += n
+                return
+            if n > room:
+                # Keep a uniform sample of the batch that fits
+                raw_input = raw_input.sample(room, random_state=0)
+                self.dropped += n - room
+                n = room
+            self._pending += n
+        self._queue.put_nowait(raw_input)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if isinstance(item, dict):
+                columns, n = {field: [item[field]] for field in NUMERIC_FIELDS + CATEGORICAL_FIELDS}, 1
+            else:
+                columns, n = item, len(item)
+            deltas = self._deltas(columns)
+            with self._lock:
+                self._merge(deltas, n)
+            with self._pending_lock:
+                self._pending -= n
+
+    def _deltas(self, columns):
+        # The per-row work, done without holding the lock
+        numeric = {}
+        for field in NUMERIC_FIELDS:
+            values = np.asarray(columns[field], dtype=float)
+            bins = np.searchsorted(self.edges[field], values, side='right')
+            numeric[field] = (self.quantiles[field].bucket_counts(values),
+                              np.bincount(bins, minlength=len(self.bins[field])))
+        categorical = {}
+        for field in CATEGORICAL_FIELDS:
+            values, counts = np.unique(np.asarray(columns[field], dtype=object).astype(str), return_counts=True)
+            values, counts = values.tolist(), counts.tolist()
+            categorical[field] = (values, counts, self.frequencies[field].delta(values, counts))
+        return numeric, categorical
+
+    def _merge(self, deltas, n):
+        numeric, categorical = deltas
+        self.observed += n
+        for field, (buckets, bins) in numeric.items():
+            self.quantiles[field].merge(*buckets)
+            self.bins[field] += bins
+        for field, (values, counts, frequencies) in categorical.items():
+            self.frequencies[field].merge(frequencies)
+            # Space-Saving depends on the current counters: one step per distinct value
+            for value, count in zip(values, counts):
+                self.heavy_hitters[field].add(value, count)
+
+    def report(self, top=10):
+        with self._lock:
+            result = {'observed': self.observed, 'dropped': self.dropped, 'pending': self._pending,
+                      'baseline_rows': self.baseline['rows'], 'fields': {}}
+            for field in NUMERIC_FIELDS:
+                spec = self.baseline['numeric'][field]
+                result['fields'][field] = {
+                    'psi': psi(spec['fractions'], self.bins[field]) if self.observed else None,
+                    'quantiles': {str(q): self.quantiles[field].quantile(q) for q in QUANTILES},
+                    'baseline_quantiles': spec['quantiles'],
+                }
+            for field in CATEGORICAL_FIELDS:
+                expected = self.baseline['categorical'][field]
+                live = np.array([self.frequencies[field].estimate(value) for value in expected], dtype=float)
+                # Rare and never-seen values share one "other" bin
+                other = max(self.observed - live.sum(), 0)
+                expected_other = max(1 - sum(expected.values()), 0)
+                result['fields'][field] = {
+                    'psi': psi(list(expected.values()) + [expected_other], np.append(live, other))
+                    if self.observed else None,
+                    'other_share': other / self.observed if self.observed else None,
+                    'baseline_other_share': expected_other,
+                    'top': self.heavy_hitters[field].top(top),
+                }
+            return result
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    import pandas as pd
+    from cleaning import clean_listings
+
+    parser = argparse.ArgumentParser(description="Compute the drift baseline from the training CSV.")
+    parser.add_argument('data', help="training data, e.g. Bengaluru_House_Data.csv")
+    parser.add_argument('output', help="where to write the baseline JSON")
+    parser.add_argument('--bins', type=int, default=10)
+    parser.add_argument('--top-values', type=int, default=50, help="categorical values tracked individually")
+    args = parser.parse_args()
+
+    baseline = build_baseline(clean_listings(pd.read_csv(args.data, dtype=str)), args.bins, args.top_values)
+    with open(args.output, 'w') as f:
+        json.dump(baseline, f)
+    print(f"Baseline from {baseline['rows']} rows written to {args.output}")
@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# Raw listing fields accepted by the app (same names as the form)
+INPUT_FIELDS = ['size', 'total_sqft', 'bath', 'balcony', 'area_type', 'location']
+NUMERIC_FIELDS = ['size', 'total_sqft', 'bath', 'balcony']
+AREA_TYPES = ['Built_up_Area', 'Carpet_Area', 'Plot_Area', 'Super_built_up_Area']
+
+
+def validate_listings(frame):
+    """Check a batch of raw listings (one row per listing).
+
+    Returns ``(valid, errors)``: ``valid`` holds the rows that passed with
+    numeric fields converted to float (original index kept) and ``errors``
+    maps row position -> message for every rejected row.
+    """
+    frame = frame.reset_index(drop=True)
+    errors = {}
+    for field in INPUT_FIELDS:
+        if field not in frame.columns:
+            return frame.iloc[:0], {i: f"Missing field '{field}'" for i in range(len(frame))}
+
+    clean = pd.DataFrame(index=frame.index)
+    for field in INPUT_FIELDS:
+        values = frame[field]
+        missing = values.isna() | (values.astype(str).str.strip() == '')
+        if field in NUMERIC_FIELDS:
+            clean[field] = pd.to_numeric(values, errors='coerce')
+            invalid = ~missing & ~np.isfinite(clean[field])
+            for i in np.flatnonzero(invalid):
+                errors.setdefault(i, f"Invalid number for '{field}': {values.iloc[i]!r}")
+        else:
+            clean[field] = values.astype(str)
+        for i in np.flatnonzero(missing):
+            errors.setdefault(i, f"Missing field '{field}'")
+
+    return clean.drop(index=list(errors)), errors
+
+
+class FeatureEncoder:
+    """One-hot encoder compiled once from the training feature columns.
+
+    Every column name is resolved to its index position up front, so encoding
+    a listing is a handful of array writes into a preallocated matrix instead
+    of building a dict of ~200 keys per row. The output matches the old
+    per-row ``preprocess_input`` exactly.
+    """
+
+    def __init__(self, feature_columns):
+        self.feature_columns = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+        self.columns = pd.Index(self.feature_columns)
+        self.column_index = {col: i for i, col in enumerate(self.feature_columns)}
+
+        # Numeric features
+        self.bhk_idx = self.column_index['bhk']
+        self.total_sqft_idx = self.column_index['total_sqft']
+        self.bath_idx = self.column_index['bath']
+        self.bath_per_size_idx = self.column_index['bath_per_size']
+
+        # One-hot groups: raw value -> column position
+        self.balcony_index = {col: i for col, i in self.column_index.items() if col.startswith('balcony_')}
+        self.location_index = {col[len('location_'):]: i for col, i in self.column_index.items()
+                               if col.startswith('location_')}
+        self.area_type_index = {area: self.column_index[area] for area in AREA_TYPES if area in self.column_index}
+        self.other_location_idx = self.column_index['location_Other']
+
+        # Hash indexes used to look up a whole batch of categories at once
+        self._balcony_lookup = pd.Index(list(self.balcony_index))
+        self._balcony_positions = np.array(list(self.balcony_index.values()), dtype=np.intp)
+        self._location_lookup = pd.Index(list(self.location_index))
+        self._location_positions = np.array(list(self.location_index.values()), dtype=np.intp)
+        self._area_lookup = pd.Index(list(self.area_type_index))
+        self._area_positions = np.array(list(self.area_type_index.values()), dtype=np.intp)
+
+    @property
+    def locations(self):
+        return list(self.location_index)
+
+    def encode_one(self, raw_input):
+        """Encode a single raw input dict into a (1, n_features) matrix."""
+        row = np.zeros((1, self.n_features))
+        x = row[0]
+
+        size = raw_input['size']
+        bath = raw_input['bath']
+        x[self.bath_idx] = bath
+        x[self.total_sqft_idx] = raw_input['total_sqft']
+        x[self.bhk_idx] = size
+        x[self.bath_per_size_idx] = bath / size if size else 0
+
+        idx = self.balcony_index.get(f'balcony_{float(raw_input["balcony"])}')
+        if idx is not None:
+            x[idx] = 1
+
+        # Use 'Other' if location unknown
+        x[self.location_index.get(raw_input['location'], self.other_location_idx)] = 1
+
+        idx = self.area_type_index.get(raw_input['area_type'])
+        if idx is not None:
+            x[idx] = 1
+        return row
+
+    def encode(self, records, sparse=False):
+        """Encode many listings at once.
+
+        ``records`` is either a list of raw input dicts or a DataFrame with
+        the ``INPUT_FIELDS`` columns. Returns a float matrix with one row per
+        listing, columns in ``feature_columns`` order: dense by default, or
+        a SciPy CSR matrix with ``sparse=True``.
+        """
+        if isinstance(records, pd.DataFrame):
+            columns = {field: records[field].to_numpy() for field in INPUT_FIELDS}
+        else:
+            columns = {field: [r[field] for r in records] for field in INPUT_FIELDS}
+        if sparse:
+            return self.encode_columns_sparse(**columns)
+        return self.encode_columns(**columns)
+
+    def encode_columns(self, size, total_sqft, bath, balcony, area_type, location):
+        """Encode column arrays (one entry per listing) into a preallocated matrix."""
+        size = np.asarray(size, dtype=float)
+        bath = np.asarray(bath, dtype=float)
+        n = len(size)
+        X = np.zeros((n, self.n_features))
+        rows = np.arange(n)
+
+        X[:, self.bath_idx] = bath
+        X[:, self.total_sqft_idx] = np.asarray(total_sqft, dtype=float)
+        X[:, self.bhk_idx] = size
+        np.divide(bath, size, out=X[:, self.bath_per_size_idx], where=size != 0)
+
+        balcony_cols = ['balcony_' + str(b) for b in np.asarray(balcony, dtype=float).tolist()]
+        self._set_one_hot(X, rows, self._balcony_lookup, self._balcony_positions, balcony_cols)
+
+        loc = self._location_lookup.get_indexer(pd.Index(location, dtype=object))
+        positions = np.where(loc >= 0, self._location_positions[loc], self.other_location_idx)
+        X[rows, positions] = 1
+
+        self._set_one_hot(X, rows, self._area_lookup, self._area_positions, area_type)
+        return X
+
+    def encode_columns_sparse(self, size, total_sqft, bath, balcony, area_type, location):
+        """Same as ``encode_columns`` but builds a CSR matrix directly.
+
+        Each row has at most 7 non-zeros (4 numeric features plus one
+        balcony, location and area type column) out of ~200 columns, so this
+        stores a small fraction of the dense matrix.
+        """
+        size = np.asarray(size, dtype=float)
+        bath = np.asarray(bath, dtype=float)
+        n = len(size)
+        data = np.zeros((n, 7))
+        cols = np.full((n, 7), -1, dtype=np.intp)
+
+        data[:, 0], cols[:, 0] = bath, self.bath_idx
+        data[:, 1], cols[:, 1] = np.asarray(total_sqft, dtype=float), self.total_sqft_idx
+        data[:, 2], cols[:, 2] = size, self.bhk_idx
+        np.divide(bath, size, out=data[:, 3], where=size != 0)
+        cols[:, 3] = self.bath_per_size_idx
+
+        balcony_cols = ['balcony_' + str(b) for b in np.asarray(balcony, dtype=float).tolist()]
+        cols[:, 4] = self._lookup_positions(self._balcony_lookup, self._balcony_positions, balcony_cols)
+
+        loc = self._location_lookup.get_indexer(pd.Index(location, dtype=object))
+        cols[:, 5] = np.where(loc >= 0, self._location_positions[loc], self.other_location_idx)
+
+        cols[:, 6] = self._lookup_positions(self._area_lookup, self._area_positions, area_type)
+        data[:, 4:] = 1
+
+        # Drop zeros and unknown categories, keep column indices sorted within each row
+        keep = (cols >= 0) & (data != 0)
+        order = np.argsort(np.where(keep, cols, self.n_features), axis=1, kind='stable')
+        cols = np.take_along_axis(cols, order, axis=1)
+        data = np.take_along_axis(data, order, axis=1)
+        keep = np.take_along_axis(keep, order, axis=1)
+
+        indptr = np.zeros(n + 1, dtype=np.intp)
+        np.cumsum(keep.sum(axis=1), out=indptr[1:])
+        return sp.csr_matrix((data[keep], cols[keep], indptr), shape=(n, self.n_features))
+
+    @staticmethod
+    def _lookup_positions(lookup, positions, values):
+        # Column position per value, -1 where the value is unknown
+        found = lookup.get_indexer(pd.Index(values, dtype=object))
+        return np.where(found >= 0, positions[found], -1)
+
+    @staticmethod
+    def _set_one_hot(X, rows, lookup, positions, values):
+        # Unknown values leave the whole group at 0
+        found = lookup.get_indexer(pd.Index(values, dtype=object))
+        hit = found >= 0
+        X[rows[hit], positions[found[hit]]] = 1
+
+    def to_frame(self, X):
+        """Wrap an encoded matrix as a DataFrame with the model's column names.
+
+        CSR input gives a sparse-backed frame, which sklearn converts back
+        to CSR without densifying.
+        """
+        if sp.issparse(X):
+            return pd.DataFrame.sparse.from_spmatrix(X, columns=self.columns)
+        return pd.DataFrame(X, columns=self.columns, copy=False)
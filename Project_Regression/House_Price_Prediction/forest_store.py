@@ -0,0 +1,199 @@
+"""Flat-array storage for the random forest, loadable with memory mapping.
+
+``joblib.load`` of the pickled forest copies every tree's node arrays into
+private memory, so each worker process holds a full copy of the model.
+``export_forest`` writes all trees as a handful of concatenated ``.npy``
+files instead; ``load_forest`` opens them with ``mmap_mode='r'`` so every
+worker on the box shares the same pages through the OS page cache, and
+startup does not unpickle any estimator objects.
+
+Export once after training::
+
+    python forest_store.py random_forest_model.pkl random_forest_arrays
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import scipy.sparse as sp
+
+FORMAT_VERSION = 1
+ARRAYS = ['feature', 'threshold', 'left', 'right', 'value', 'roots']
+
+
+class ArrayForest:
+    """Random forest regressor backed by flat node arrays.
+
+    All trees are concatenated into one set of arrays; ``roots[t]`` is the
+    index of tree ``t``'s root node. Leaves point to themselves with an
+    infinite threshold, so a row that reaches a leaf stays there and
+    traversal can stop once no row moves any more.
+    Predictions are identical to ``RandomForestRegressor.predict``.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots,
+                 max_depth, n_features, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.feature_names = feature_names
+        self.n_estimators = len(roots)
+
+    @classmethod
+    def from_estimator(cls, model):
+        """Flatten a fitted ``RandomForestRegressor`` (single output)."""
+        trees = [est.tree_ for est in model.estimators_]
+        roots = np.cumsum([0] + [t.node_count for t in trees[:-1]]).astype(np.int64)
+        feature, threshold, left, right, value = [], [], [], [], []
+
+        for root, tree in zip(roots, trees):
+            ids = np.arange(tree.node_count) + root
+            is_leaf = tree.children_left == -1
+            # Leaves loop back to themselves so traversal can run a fixed depth
+            left.append(np.where(is_leaf, ids, tree.children_left + root))
+            right.append(np.where(is_leaf, ids, tree.children_right + root))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            value.append(tree.value[:, 0, 0])
+
+        feature_names = getattr(model, 'feature_names_in_', None)
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            left=np.concatenate(left).astype(np.int64),
+            right=np.concatenate(right).astype(np.int64),
+            value=np.concatenate(value).astype(np.float64),
+            roots=roots,
+            max_depth=max(t.max_depth for t in trees),
+            n_features=model.n_features_in_,
+            feature_names=None if feature_names is None else list(feature_names),
+        )
+
+    def apply(self, X):
+        """Return the leaf reached by every row in every tree, shape (n_trees, n_rows)."""
+        # Trees compare float32 features against float64 thresholds, like sklearn
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features, got shape {X.shape}")
+        n_rows = X.shape[0]
+        node = np.repeat(np.asarray(self.roots), n_rows)
+        rows = np.tile(np.arange(n_rows), self.n_estimators)
+        # Walk (tree, row) pairs level by level; pairs that reached a leaf stop moving and drop out
+        active = np.arange(node.size)
+        while active.size:
+            current = node[active]
+            go_left = X[rows[active], self.feature[current]] <= self.threshold[current]
+            step = np.where(go_left, self.left[current], self.right[current])
+            node[active] = step
+            active = active[step != current]
+        return node.reshape(self.n_estimators, n_rows)
+
+    def predict_one_trees(self, x):
+        """Per-tree outputs for a single encoded row (1-D array of ``n_features``).
+
+        Skips input validation and walks all trees at once, stopping as
+        soon as every tree has reached a leaf.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        feature, threshold, left, right = self.feature, self.threshold, self.left, self.right
+        node = np.asarray(self.roots)
+        for _ in range(self.max_depth):
+            next_node = np.where(x[feature[node]] <= threshold[node], left[node], right[node])
+            if np.array_equal(next_node, node):
+                break
+            node = next_node
+        return self.value[node]
+
+    def predict_one(self, x):
+        """Fast path for a single encoded row."""
+        return np.cumsum(self.predict_one_trees(x), dtype=np.float64)[-1] / self.n_estimators
+
+    def predict_one_interval(self, x, quantiles=(10, 90)):
+        """Mean and per-tree percentiles for a single encoded row."""
+        per_tree = self.predict_one_trees(x)
+        return np.cumsum(per_tree, dtype=np.float64)[-1] / self.n_estimators, np.percentile(per_tree, quantiles)
+
+    def predict_trees(self, X, chunk_size=4096):
+        """Output of every tree for every row, shape (n_trees, n_rows)."""
+        # Sparse input (CSR or a sparse-backed DataFrame) is densified a chunk at a time
+        if hasattr(X, 'sparse'):
+            X = X.sparse.to_coo().tocsr()
+        if sp.issparse(X):
+            return np.concatenate([self.predict_trees(X[i:i + chunk_size].toarray())
+                                   for i in range(0, X.shape[0], chunk_size)], axis=1)
+        return self.value[self.apply(X)]
+
+    def predict(self, X, chunk_size=4096):
+        # Sum trees in order, as sklearn does, so results match bit for bit
+        per_tree = self.predict_trees(X, chunk_size)
+        return np.cumsum(per_tree, axis=0, dtype=np.float64)[-1] / self.n_estimators
+
+    def predict_interval(self, X, quantiles=(10, 90), model=None, chunk_size=4096):
+        """Mean prediction plus percentiles of the per-tree predictions.
+
+        Returns ``(mean, bounds)`` where ``mean`` equals ``predict(X)`` and
+        ``bounds`` has shape (len(quantiles), n_rows). All trees are scored
+        in one pass and the quantiles come from a single ``np.percentile``.
+        If the sklearn ``model`` this forest was built from is given, its
+        multithreaded ``apply`` finds the leaves, which is faster on large
+        batches.
+        """
+        if model is None:
+            per_tree = self.predict_trees(X, chunk_size)
+        else:
+            # apply() gives per-tree node ids; node ids here are offset by each tree's root
+            per_tree = self.value[np.asarray(self.roots) + model.apply(X)].T
+        mean = np.cumsum(per_tree, axis=0, dtype=np.float64)[-1] / self.n_estimators
+        return mean, np.percentile(per_tree, quantiles, axis=0)
+
+
+def export_forest(model, path):
+    """Write a fitted forest to ``path`` as memory-mappable ``.npy`` files."""
+    forest = model if isinstance(model, ArrayForest) else ArrayForest.from_estimator(model)
+    os.makedirs(path, exist_ok=True)
+    for name in ARRAYS:
+        np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(getattr(forest, name)))
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'n_estimators': forest.n_estimators,
+        'n_features': forest.n_features,
+        'max_depth': int(forest.max_depth),
+        'feature_names': forest.feature_names,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    return forest
+
+
+def load_forest(path, mmap_mode='r'):
+    """Open a forest written by ``export_forest``.
+
+    With the default ``mmap_mode='r'`` nothing is read up front; node arrays
+    are paged in on demand and shared between processes.
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported forest format version {meta['format_version']}")
+    # Plain ndarray views of the maps: same shared pages, without np.memmap's per-indexing overhead
+    arrays = {name: np.asarray(np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)) for name in ARRAYS}
+    return ArrayForest(max_depth=meta['max_depth'], n_features=meta['n_features'],
+                       feature_names=meta['feature_names'], **arrays)
+
+
+if __name__ == '__main__':
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export the pickled random forest to memory-mappable arrays.")
+    parser.add_argument('model', help="pickled RandomForestRegressor, e.g. random_forest_model.pkl")
+    parser.add_argument('output', help="directory to write the .npy node arrays into")
+    args = parser.parse_args()
+
+    forest = export_forest(joblib.load(args.model), args.output)
+    print(f"Exported {forest.n_estimators} trees ({len(forest.value)} nodes) to {args.output}")
@@ -0,0 +1,200 @@
+"""Asynchronous bulk scoring of large listing files.
+
+A job is a directory under ``JOBS_DIR`` holding the uploaded CSV
+(``Bengaluru_House_Data.csv`` schema), a ``status.json`` and, once done,
+``result.csv``: the input rows with ``predicted_price`` and ``error``
+columns appended. Jobs run in a local process pool. Each worker reads the
+file ``chunk_rows`` at a time, cleans, encodes (sparse) and scores the
+chunk, appends it to the output and rewrites ``status.json``, so memory
+stays flat however large the file is and any web worker can report the
+progress by reading the status file.
+"""
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import types
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from cleaning import clean_listings
+from encoder import validate_listings
+from model_registry import load_bundle
+
+STATUS = 'status.json'
+INPUT = 'input.csv'
+RESULT = 'result.csv'
+JOB_ID = re.compile(r'[0-9a-f]{32}')
+
+# Settings the worker processes need to load the model the same way the app does
+MODEL_CONFIG_KEYS = ['MODEL_FORMAT', 'MODEL_ARRAYS_DIR']
+
+# Bundles loaded by this worker process, by (model path, version)
+_bundles = {}
+
+
+def write_status(job_dir, **fields):
+    """Merge ``fields`` into the job's status file (atomically replaced)."""
+    status = read_status(job_dir) or {}
+    status.update(fields)
+    tmp = os.path.join(job_dir, STATUS + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp, os.path.join(job_dir, STATUS))
+    return status
+
+
+def read_status(job_dir):
+    """The job's status, or None if it is missing or unreadable."""
+    try:
+        with open(os.path.join(job_dir, STATUS)) as f:
+            status = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return status if isinstance(status, dict) else None
+
+
+def _get_bundle(model_path, version, model_config):
+    key = (model_path, version)
+    if key not in _bundles:
+        # Batch scoring goes through sklearn's multithreaded predict; no serving extras needed
+        config = dict(model_config, INFERENCE_ENGINE='sklearn', PREDICTION_INTERVALS=False,
+                      PRICE_TABLE_DIR=None, MICRO_BATCHING=False)
+        _bundles.clear()
+        _bundles[key] = load_bundle(model_path, config, version)
+    return _bundles[key]
+
+
+def score_chunk(bundle, chunk):
+    """Clean and score one chunk of raw rows; returns the chunk with results appended."""
+    chunk = chunk.reset_index(drop=True)
+    valid, errors = validate_listings(clean_listings(chunk))
+    prices = np.full(len(chunk), np.nan)
+    if len(valid):
+        X = bundle.encoder.encode(valid, sparse=True)
+        prices[valid.index] = bundle.model.predict(bundle.encoder.to_frame(X))
+    chunk['predicted_price'] = np.round(prices, 2)
+    chunk['error'] = pd.Series(errors, index=list(errors), dtype=object).reindex(chunk.index)
+    return chunk, len(errors)
+
+
+def run_job(job_dir, model_path, version, model_config, chunk_rows):
+    """Score ``job_dir``'s input file in chunks (runs in a pool process)."""
+    start = time.time()
+    write_status(job_dir, state='running', started=start, pid=os.getpid())
+    try:
+        bundle = _get_bundle(model_path, version, model_config)
+        rows = failed = 0
+        part = os.path.join(job_dir, RESULT + '.part')
+        with open(os.path.join(job_dir, INPUT), 'rb') as f, open(part, 'w', newline='') as out:
+            for chunk in pd.read_csv(f, chunksize=chunk_rows, dtype=str):
+                chunk, chunk_failed = score_chunk(bundle, chunk)
+                chunk.to_csv(out, header=rows == 0, index=False)
+                rows += len(chunk)
+                failed += chunk_failed
+                elapsed = time.time() - start
+                write_status(job_dir, rows_done=rows, rows_failed=failed, bytes_read=f.tell(),
+                             elapsed_seconds=round(elapsed, 2), rows_per_second=round(rows / elapsed, 1))
+        os.replace(part, os.path.join(job_dir, RESULT))
+    except Exception as e:
+        write_status(job_dir, state='failed', finished=time.time(), error=f"{type(e).__name__}: {e}")
+        raise
+    write_status(job_dir, state='done', finished=time.time(), bytes_read=os.path.getsize(os.path.join(job_dir, INPUT)))
+
+
+@contextmanager
+def _bare_main_module():
+    """Hide the real ``__main__`` while pool processes are started.
+
+    A spawned process re-imports the parent's main module (as
+    ``__mp_main__``). When the server runs as ``python app.py`` that would be
+    app.py itself, so every job worker would load the model and start the
+    registry at import. The workers only need this module, so they are
+    started with an empty ``__main__`` instead.
+    """
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+class JobManager:
+    """Creates job directories and runs them in a process pool."""
+
+    def __init__(self, root, max_workers=1, chunk_rows=50_000):
+        # Absolute, so result paths do not depend on the CWD (Flask's send_file
+        # resolves relative paths against the app's root_path)
+        self.root = os.path.abspath(root)
+        self.max_workers = max_workers
+        self.chunk_rows = chunk_rows
+        self._pool = None
+
+    @property
+    def pool(self):
+        # Started on first use; 'spawn' keeps the workers clear of the web server's threads
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def job_dir(self, job_id):
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        path = os.path.join(self.root, job_id)
+        return path if os.path.isdir(path) else None
+
+    def submit(self, upload, bundle, config):
+        """Save ``upload`` (a Werkzeug ``FileStorage``) and queue it for scoring."""
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.root, job_id)
+        os.makedirs(job_dir)
+        upload.save(os.path.join(job_dir, INPUT))
+        write_status(job_dir, id=job_id, state='queued', created=time.time(), filename=upload.filename,
+                     model_version=bundle.version, input_bytes=os.path.getsize(os.path.join(job_dir, INPUT)),
+                     bytes_read=0, rows_done=0, rows_failed=0)
+
+        model_config = {key: config[key] for key in MODEL_CONFIG_KEYS}
+        # The pool starts its worker processes inside submit()
+        with _bare_main_module():
+            future = self.pool.submit(run_job, job_dir, os.path.abspath(bundle.path), bundle.version,
+                                      model_config, self.chunk_rows)
+        future.add_done_callback(lambda f: self._check_failed(job_dir, f))
+        return job_id
+
+    @staticmethod
+    def _check_failed(job_dir, future):
+        # run_job records its own errors; this catches a worker process that died
+        error = future.exception()
+        status = read_status(job_dir) or {}
+        if error is not None and status.get('state') not in ('done', 'failed'):
+            write_status(job_dir, state='failed', finished=time.time(), error=f"{type(error).__name__}: {error}")
+
+    def status(self, job_id):
+        job_dir = self.job_dir(job_id)
+        if job_dir is None:
+            return None
+        status = read_status(job_dir)
+        if status is None or 'state' not in status:
+            # Directory created but the status not written yet (or lost in a crash)
+            return {'id': job_id, 'state': 'pending'}
+        if status.get('input_bytes'):
+            status['progress'] = round(min(status.get('bytes_read', 0) / status['input_bytes'], 1.0), 4)
+        return status
+
+    def result_path(self, job_id):
+        job_dir = self.job_dir(job_id)
+        if job_dir is None:
+            return None
+        path = os.path.join(job_dir, RESULT)
+        return path if os.path.isfile(path) else None
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
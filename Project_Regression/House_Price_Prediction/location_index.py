@@ -0,0 +1,61 @@
+from bisect import bisect_left
+
+
+def normalize(name):
+    """Lowercase with single spaces, the form locations are matched in."""
+    return ' '.join(name.lower().split())
+
+
+class LocationIndex:
+    """Prefix search over the model's known locations.
+
+    Every location is indexed under its full name and under each word it
+    contains, in one sorted array of lowercase keys, so a lookup is a
+    binary search plus a scan over the matches. Results are ranked with
+    full-name prefix matches first ("whi" -> "Whitefield"), then word
+    matches ("nagar" -> "1st Phase JP Nagar"), shorter names first.
+
+    ``resolve`` maps a submitted name to the exact location it refers to.
+    ``other`` (the model's bucket for unlisted locations) is accepted there
+    but never returned by ``search``.
+    """
+
+    def __init__(self, locations, other=None):
+        self.locations = sorted(set(locations))
+        self.other = other
+        self._canonical = {normalize(name): name for name in self.locations}
+        if other is not None:
+            self._canonical[normalize(other)] = other
+        entries = []
+        for name in self.locations:
+            # Same normalization as the search prefix: lowercase, single spaces
+            lower = normalize(name)
+            entries.append((lower, 0, name))
+            for i, ch in enumerate(lower):
+                if i > 0 and ch != ' ' and lower[i - 1] == ' ':
+                    entries.append((lower[i:], 1, name))
+        entries.sort()
+        self._keys = [key for key, _, _ in entries]
+        self._entries = [(rank, name) for _, rank, name in entries]
+
+    def __len__(self):
+        return len(self.locations)
+
+    def resolve(self, name):
+        """The location ``name`` refers to, ignoring case and spacing; None if unknown."""
+        return self._canonical.get(normalize(name))
+
+    def search(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return self.locations[:limit]
+
+        best = {}
+        i = bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            rank, name = self._entries[i]
+            if rank < best.get(name, 2):
+                best[name] = rank
+            i += 1
+        ranked = sorted(best, key=lambda name: (best[name], len(name), name))
+        return ranked[:limit]
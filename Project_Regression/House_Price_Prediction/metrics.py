@@ -0,0 +1,125 @@
+"""In-process latency histograms and counters, rendered in Prometheus text format."""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts plus a window of recent samples for quantiles."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=2048):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def quantiles(self, qs=QUANTILES):
+        if not self.recent:
+            return {q: float('nan') for q in qs}
+        values = np.quantile(np.fromiter(self.recent, dtype=float), qs)
+        return dict(zip(qs, values.tolist()))
+
+
+class Metrics:
+    """Registry for per-stage latency and request counters.
+
+    Usage::
+
+        with metrics.time('preprocess'):
+            ...
+        metrics.count_request('/predict', 'ok')
+    """
+
+    def __init__(self, namespace='house_price', window=2048):
+        self.namespace = namespace
+        self.window = window
+        self.started = time.time()
+        self._stages = {}
+        self._requests = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = LatencyHistogram(window=self.window)
+            hist.observe(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count_request(self, endpoint, outcome):
+        """``outcome`` is 'ok', 'invalid' (bad input) or 'error' (exception)."""
+        with self._lock:
+            self._requests[(endpoint, outcome)] += 1
+
+    def render(self, extra_gauges=None):
+        """Prometheus text exposition of everything recorded so far.
+
+        ``extra_gauges`` is an optional ``{name: value}`` dict appended as
+        plain gauges (e.g. cache statistics).
+        """
+        ns = self.namespace
+        lines = [
+            f'# HELP {ns}_requests_total Requests handled, by endpoint and outcome.',
+            f'# TYPE {ns}_requests_total counter',
+        ]
+        with self._lock:
+            for (endpoint, outcome), n in sorted(self._requests.items()):
+                lines.append(f'{ns}_requests_total{{endpoint="{endpoint}",outcome="{outcome}"}} {n}')
+
+            lines += [
+                f'# HELP {ns}_stage_seconds Latency of each request stage.',
+                f'# TYPE {ns}_stage_seconds histogram',
+            ]
+            for stage, hist in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, n in zip(hist.buckets, hist.counts):
+                    cumulative += n
+                    lines.append(f'{ns}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{ns}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                lines.append(f'{ns}_stage_seconds_sum{{stage="{stage}"}} {hist.sum}')
+                lines.append(f'{ns}_stage_seconds_count{{stage="{stage}"}} {hist.count}')
+
+            lines += [
+                f'# HELP {ns}_stage_latency_seconds Latency quantiles over the last {self.window} samples per stage.',
+                f'# TYPE {ns}_stage_latency_seconds summary',
+            ]
+            for stage, hist in sorted(self._stages.items()):
+                for q, value in hist.quantiles().items():
+                    lines.append(f'{ns}_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {value}')
+                lines.append(f'{ns}_stage_latency_seconds_sum{{stage="{stage}"}} {hist.sum}')
+                lines.append(f'{ns}_stage_latency_seconds_count{{stage="{stage}"}} {hist.count}')
+
+        lines += [
+            f'# HELP {ns}_uptime_seconds Seconds since the process started serving.',
+            f'# TYPE {ns}_uptime_seconds gauge',
+            f'{ns}_uptime_seconds {time.time() - self.started}',
+        ]
+        for name, value in (extra_gauges or {}).items():
+            lines.append(f'# TYPE {ns}_{name} gauge')
+            lines.append(f'{ns}_{name} {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,238 @@
+"""Loading, warming and hot-swapping the served model.
+
+Everything that depends on one trained model (forest, encoder, location
+index, micro-batcher, price table) lives in a ``ModelBundle``. Requests
+read ``registry.active`` once and use that bundle to the end, so a swap
+never mixes two models inside one request and in-flight requests finish
+on the model they started with.
+"""
+import logging
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from artifacts import latest_version, read_manifest, verify_version
+from batcher import MicroBatcher
+from encoder import FeatureEncoder
+from forest_store import ArrayForest, load_forest
+from location_index import LocationIndex
+from price_table import load_table, matches_model
+
+logger = logging.getLogger(__name__)
+
+# How long a replaced bundle's micro-batcher keeps serving in-flight requests
+RETIRE_AFTER_SECONDS = 30
+
+
+def sample_listings(encoder, n=25):
+    """A few representative listings used for checks and warm-up."""
+    return [{'size': 2, 'total_sqft': 1200, 'bath': 2, 'balcony': 1, 'area_type': area, 'location': location}
+            for area in encoder.area_type_index for location in encoder.locations[:n]]
+
+
+class ModelBundle:
+    """One loaded model version and everything derived from it."""
+
+    def __init__(self, version, path, model, encoder, batcher=None, price_table=None, forest=None):
+        self.version = version
+        self.path = path
+        self.model = model
+        # Flat-array forest used for per-tree prediction intervals (the model itself when compiled)
+        self.forest = forest
+        self.encoder = encoder
+        self.feature_columns = encoder.feature_columns
+        # Prefix index for the location autocomplete ('Other' is the bucket for unknown locations)
+        self.location_index = LocationIndex([loc for loc in self.encoder.locations if loc != 'Other'], other='Other')
+        self.batcher = batcher
+        self.price_table = price_table
+        self.created = None
+        self.loaded_at = time.time()
+        self.load_seconds = None
+        self.warmup_seconds = None
+
+    def info(self):
+        return {
+            'version': self.version,
+            'path': os.path.abspath(self.path),
+            'model': type(self.model).__name__,
+            'n_features': len(self.feature_columns),
+            'locations': len(self.location_index),
+            'micro_batching': self.batcher is not None,
+            'price_table': self.price_table is not None,
+            'intervals': self.forest is not None,
+            'created': self.created,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)),
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+        }
+
+    def retire(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+def compile_forest(model, encoder):
+    """Flatten a sklearn forest and check it agrees with sklearn before serving it."""
+    compiled = ArrayForest.from_estimator(model)
+    sample = encoder.encode(sample_listings(encoder))
+    if not np.array_equal(compiled.predict(sample), model.predict(encoder.to_frame(sample))):
+        raise ValueError("Compiled forest predictions differ from the sklearn model")
+    return compiled
+
+
+def load_bundle(path, config, version):
+    """Load the model stored in ``path`` according to the app ``config``.
+
+    ``path`` holds ``feature_columns.pkl`` plus ``random_forest_model.pkl``
+    and/or the ``MODEL_ARRAYS_DIR`` export; ``PRICE_TABLE_DIR`` is also
+    resolved relative to it.
+    """
+    start = time.perf_counter()
+    feature_columns = joblib.load(os.path.join(path, "feature_columns.pkl"))
+    # Compile the one-hot encoder once; column positions are resolved here, not per request
+    encoder = FeatureEncoder(feature_columns)
+
+    if config['MODEL_FORMAT'] == 'arrays':
+        model = load_forest(os.path.join(path, config['MODEL_ARRAYS_DIR']))
+        if model.feature_names is not None and model.feature_names != feature_columns:
+            raise ValueError("Forest arrays were exported for different feature columns")
+    else:
+        model = joblib.load(os.path.join(path, "random_forest_model.pkl"))
+        if config['INFERENCE_ENGINE'] == 'arrays':
+            model = compile_forest(model, encoder)
+
+    # Per-tree outputs for prediction intervals come from the flat arrays
+    forest = None
+    if isinstance(model, ArrayForest):
+        forest = model
+    elif config['PREDICTION_INTERVALS']:
+        forest = compile_forest(model, encoder)
+
+    # Precomputed prices for the common input grid
+    price_table = None
+    if config['PRICE_TABLE_DIR']:
+        price_table = load_table(os.path.join(path, config['PRICE_TABLE_DIR']),
+                                 interpolate=config['PRICE_TABLE_INTERPOLATE'])
+        if not matches_model(price_table, model, encoder):
+            logger.warning("Price table in %s does not match the loaded model; ignoring it", path)
+            price_table = None
+
+    # Queue concurrent single-row predictions and score them in one call
+    batcher = None
+    if config['MICRO_BATCHING']:
+        batcher = MicroBatcher(lambda X: model.predict(encoder.to_frame(X)),
+                               max_batch_size=config['MICRO_BATCH_MAX_SIZE'],
+                               max_wait_ms=config['MICRO_BATCH_MAX_WAIT_MS'])
+
+    bundle = ModelBundle(version, path, model, encoder, batcher, price_table, forest)
+    bundle.load_seconds = round(time.perf_counter() - start, 4)
+    return bundle
+
+
+def warm_up(bundle, rounds=3):
+    """Run a few test predictions through every path the bundle serves."""
+    start = time.perf_counter()
+    encoder = bundle.encoder
+    listings = sample_listings(encoder, n=5)
+    for _ in range(rounds):
+        bundle.model.predict(encoder.to_frame(encoder.encode(listings)))
+        for listing in listings[:3]:
+            row = encoder.encode_one(listing)
+            if isinstance(bundle.model, ArrayForest):
+                bundle.model.predict_one(row[0])
+            else:
+                bundle.model.predict(encoder.to_frame(row))
+            if bundle.forest is not None:
+                bundle.forest.predict_one_interval(row[0])
+    bundle.warmup_seconds = round(time.perf_counter() - start, 4)
+
+
+class ModelRegistry:
+    """Holds the active bundle and swaps in new versions from an artifact root.
+
+    ``start()`` launches a daemon thread that polls ``root`` every
+    ``poll_seconds``. A newer version is checksum-verified, loaded and
+    warmed in that thread while the current bundle keeps serving, then
+    swapped in with a single reference assignment.
+    """
+
+    def __init__(self, root, config, poll_seconds=5):
+        # root=None serves a single bundle passed to activate() and never reloads
+        self.root = root
+        self.config = config
+        self.poll_seconds = poll_seconds
+        self.active = None
+        self.last_error = None
+        self.last_check = None
+        self.history = []
+        self._failed = set()
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load_version(self, version):
+        path = os.path.join(self.root, version)
+        verify_version(path)
+        bundle = load_bundle(path, self.config, version)
+        bundle.created = read_manifest(path).get('created')
+        warm_up(bundle)
+        return bundle
+
+    def activate(self, bundle):
+        previous, self.active = self.active, bundle
+        self.history.append({'version': bundle.version, 'activated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                             'load_seconds': bundle.load_seconds, 'warmup_seconds': bundle.warmup_seconds})
+        del self.history[:-20]
+        if previous is not None:
+            # Requests that already picked up the old bundle may still be using it
+            timer = threading.Timer(RETIRE_AFTER_SECONDS, previous.retire)
+            timer.daemon = True
+            timer.start()
+        logger.info("Serving model version %s", bundle.version)
+
+    def check(self):
+        """Load and activate the newest version if it differs from the active one."""
+        if self.root is None:
+            return False
+        with self._reload_lock:
+            self.last_check = time.time()
+            version = latest_version(self.root)
+            if version is None or version in self._failed:
+                return False
+            if self.active is not None and version == self.active.version:
+                return False
+            try:
+                bundle = self.load_version(version)
+            except Exception as e:
+                # Keep serving the current model until a newer version shows up
+                self._failed.add(version)
+                self.last_error = f"{version}: {e}"
+                logger.exception("Could not load model version %s", version)
+                return False
+            self.last_error = None
+            self.activate(bundle)
+            return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.check()
+
+    def status(self):
+        return {
+            'root': self.root and os.path.abspath(self.root),
+            'poll_seconds': self.poll_seconds,
+            'active': self.active.info() if self.active is not None else None,
+            'last_check': self.last_check and time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.last_check)),
+            'last_error': self.last_error,
+            'history': self.history,
+        }
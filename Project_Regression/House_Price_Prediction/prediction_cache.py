@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+from encoder import INPUT_FIELDS
+
+MISSING = object()
+
+
+def cache_key(raw_input):
+    """Normalized, hashable key for a raw input dict."""
+    return tuple(raw_input[field] for field in INPUT_FIELDS)
+
+
+class PredictionCache:
+    """Bounded, thread-safe LRU cache of predictions with optional TTL.
+
+    Entries belong to one model version: ``check_version`` drops everything
+    as soon as it is called with a different version token, so a new model
+    or feature column list never serves stale prices.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def check_version(self, version):
+        if version != self.version:
+            with self._lock:
+                self._data.clear()
+                self.version = version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key, MISSING)
+            if entry is MISSING:
+                self.misses += 1
+                return MISSING
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
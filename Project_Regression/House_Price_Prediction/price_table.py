@@ -0,0 +1,211 @@
+"""Precomputed price lookup table for the common, quantized input space.
+
+Most requests fall on a small discrete grid: a known location, 1-6 BHK,
+a whole number of bathrooms, 0-3 balconies, one of the four area types,
+and a typical ``total_sqft``. ``build_table`` scores that whole grid with
+the forest offline and saves it as one memory-mappable float32 array;
+``PriceTable.lookup`` then answers on-grid requests with an array read
+(optionally interpolating linearly between ``total_sqft`` grid points)
+and returns ``None`` so the caller falls back to the live model otherwise.
+
+Build it once per model::
+
+    python price_table.py random_forest_model.pkl feature_columns.pkl price_table
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from encoder import AREA_TYPES, FeatureEncoder
+
+FORMAT_VERSION = 1
+
+
+class PriceTable:
+    """Read side of the table: grid axes plus a (location, bhk, bath,
+    balcony, area_type, total_sqft) array of prices."""
+
+    def __init__(self, prices, axes, interpolate=False, report=None):
+        self.prices = prices
+        self.axes = axes
+        self.interpolate = interpolate
+        self.report = report or {}
+        self.location_pos = {name: i for i, name in enumerate(axes['location'])}
+        self.area_pos = {name: i for i, name in enumerate(axes['area_type'])}
+        self.sqft = np.asarray(axes['total_sqft'], dtype=float)
+        self.hits = 0
+        self.misses = 0
+
+    def _index(self, raw_input):
+        # Unknown locations are encoded as 'Other', exactly like the encoder does
+        loc = self.location_pos.get(raw_input['location'], self.location_pos.get('Other'))
+        area = self.area_pos.get(raw_input['area_type'])
+        if loc is None or area is None:
+            return None
+        idx = [loc]
+        # Integer axes are consecutive, so the position is an offset from the first value
+        for field, axis in (('size', 'bhk'), ('bath', 'bath'), ('balcony', 'balcony')):
+            value = float(raw_input[field])
+            if not value.is_integer():
+                return None
+            pos = int(value) - self.axes[axis][0]
+            if not 0 <= pos < len(self.axes[axis]):
+                return None
+            idx.append(pos)
+        idx.append(area)
+        return tuple(idx)
+
+    def lookup(self, raw_input):
+        """Price for ``raw_input`` from the table, or ``None`` if it is off the grid."""
+        idx = self._index(raw_input)
+        price = None
+        if idx is not None:
+            sqft = raw_input['total_sqft']
+            pos = int(np.searchsorted(self.sqft, sqft))
+            if pos < len(self.sqft) and self.sqft[pos] == sqft:
+                price = float(self.prices[idx + (pos,)])
+            elif self.interpolate and 0 < pos < len(self.sqft):
+                lo, hi = self.sqft[pos - 1], self.sqft[pos]
+                p_lo, p_hi = self.prices[idx + (slice(pos - 1, pos + 1),)]
+                price = float(p_lo + (p_hi - p_lo) * (sqft - lo) / (hi - lo))
+        if price is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return price
+
+    def stats(self):
+        return {
+            'shape': list(self.prices.shape),
+            'interpolate': self.interpolate,
+            'hits': self.hits,
+            'misses': self.misses,
+            'report': self.report,
+        }
+
+
+def grid_axes(encoder, max_bhk=6, max_bath=6, sqft_min=300, sqft_max=4000, sqft_step=50):
+    return {
+        'location': encoder.locations,
+        'bhk': list(range(1, max_bhk + 1)),
+        'bath': list(range(1, max_bath + 1)),
+        'balcony': [0, 1, 2, 3],
+        'area_type': [area for area in AREA_TYPES if area in encoder.area_type_index],
+        'total_sqft': np.arange(sqft_min, sqft_max + sqft_step / 2, sqft_step).tolist(),
+    }
+
+
+def score_points(model, encoder, axes, location, points):
+    """Score grid points of one location; ``points`` is a (n, 5) integer
+    array of (bhk, bath, balcony, area_type, total_sqft) axis positions."""
+    columns = {
+        'size': np.asarray(axes['bhk'], dtype=float)[points[:, 0]],
+        'bath': np.asarray(axes['bath'], dtype=float)[points[:, 1]],
+        'balcony': np.asarray(axes['balcony'], dtype=float)[points[:, 2]],
+        'area_type': np.asarray(axes['area_type'], dtype=object)[points[:, 3]],
+        'total_sqft': np.asarray(axes['total_sqft'], dtype=float)[points[:, 4]],
+    }
+    columns['location'] = [location] * len(points)
+    return model.predict(encoder.to_frame(encoder.encode_columns(**columns)))
+
+
+def build_table(model, encoder, path, axes):
+    """Score every grid point with ``model`` and write ``prices.npy`` + ``meta.json``."""
+    inner_shape = tuple(len(axes[a]) for a in ('bhk', 'bath', 'balcony', 'area_type', 'total_sqft'))
+    os.makedirs(path, exist_ok=True)
+    prices = np.lib.format.open_memmap(os.path.join(path, 'prices.npy'), mode='w+', dtype=np.float32,
+                                       shape=(len(axes['location']),) + inner_shape)
+    points = np.indices(inner_shape).reshape(len(inner_shape), -1).T
+
+    start = time.perf_counter()
+    for i, location in enumerate(axes['location']):
+        # One predict call per location keeps memory bounded
+        prices[i] = score_points(model, encoder, axes, location, points).reshape(inner_shape)
+    prices.flush()
+    build_seconds = time.perf_counter() - start
+
+    table = PriceTable(prices, axes)
+    report = evaluate_table(table, model, encoder)
+    report['build_seconds'] = round(build_seconds, 2)
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({'format_version': FORMAT_VERSION, 'axes': axes, 'report': report}, f)
+    table.report = report
+    return table
+
+
+def evaluate_table(table, model, encoder, n=2000, seed=0, kinds=('grid', 'interpolated')):
+    """Compare table answers with the live model on random inputs.
+
+    Grid points measure float32 storage error; off-grid ``total_sqft``
+    values measure the error added by interpolation.
+    """
+    rng = np.random.default_rng(seed)
+    axes = table.axes
+    sqft = table.sqft
+    report = {}
+    for kind in kinds:
+        records = []
+        for _ in range(n):
+            pos = rng.integers(1, len(sqft))
+            records.append({
+                'location': axes['location'][rng.integers(len(axes['location']))],
+                'size': float(rng.choice(axes['bhk'])),
+                'bath': float(rng.choice(axes['bath'])),
+                'balcony': float(rng.choice(axes['balcony'])),
+                'area_type': axes['area_type'][rng.integers(len(axes['area_type']))],
+                'total_sqft': float(sqft[pos] if kind == 'grid' else rng.uniform(sqft[pos - 1], sqft[pos])),
+            })
+        expected = model.predict(encoder.to_frame(encoder.encode(records)))
+        interpolate, table.interpolate = table.interpolate, True
+        got = np.array([table.lookup(r) for r in records])
+        table.interpolate = interpolate
+        error = np.abs(got - expected)
+        report[kind] = {
+            'samples': n,
+            'mean_abs_error': float(error.mean()),
+            'max_abs_error': float(error.max()),
+            'mean_rel_error': float((error / np.maximum(np.abs(expected), 1e-9)).mean()),
+        }
+    table.hits = table.misses = 0
+    return report
+
+
+def matches_model(table, model, encoder, n=64, rtol=1e-5):
+    """Quick check that ``table`` was built from ``model`` (grid points only)."""
+    report = evaluate_table(table, model, encoder, n=n, seed=1, kinds=('grid',))
+    return report['grid']['mean_rel_error'] <= rtol
+
+
+def load_table(path, interpolate=False, mmap_mode='r'):
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported price table format version {meta['format_version']}")
+    prices = np.load(os.path.join(path, 'prices.npy'), mmap_mode=mmap_mode)
+    return PriceTable(prices, meta['axes'], interpolate=interpolate, report=meta['report'])
+
+
+if __name__ == '__main__':
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Precompute the price lookup table for a trained forest.")
+    parser.add_argument('model', help="pickled RandomForestRegressor, e.g. random_forest_model.pkl")
+    parser.add_argument('features', help="feature column list, e.g. feature_columns.pkl")
+    parser.add_argument('output', help="directory to write prices.npy and meta.json into")
+    parser.add_argument('--max-bhk', type=int, default=6)
+    parser.add_argument('--max-bath', type=int, default=6)
+    parser.add_argument('--sqft-min', type=float, default=300)
+    parser.add_argument('--sqft-max', type=float, default=4000)
+    parser.add_argument('--sqft-step', type=float, default=50)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    model.n_jobs = -1
+    encoder = FeatureEncoder(joblib.load(args.features))
+    axes = grid_axes(encoder, args.max_bhk, args.max_bath, args.sqft_min, args.sqft_max, args.sqft_step)
+    table = build_table(model, encoder, args.output, axes)
+    print(f"Built table of shape {table.prices.shape} in {table.report['build_seconds']}s")
+    print(json.dumps({k: v for k, v in table.report.items() if k != 'build_seconds'}, indent=2))